@@ -4,55 +4,111 @@ import sys
 import subprocess
 import datetime
 import argparse
+import csv
+import hashlib
+import http.client
+import json
+import logging
 from pathlib import Path
 import shutil
 import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from typing import List, Dict, Tuple, Optional
 
 # Parameters
 BLITZAR_HANDLE = "blitzar_handle_nu_16.bin"
 PUBIC_PARAMETERS = "public_parameters_nu_16.bin"
+BENCH_BINARY = "proof-of-sql-benches"
+DORY_PARAMS_URL = "https://github.com/spaceandtimelabs/sxt-proof-of-sql/releases/download/dory-prover-params-nu-16"
+BLITZAR_HANDLE_PARTS = ['aa', 'ab', 'ac', 'ad']
+DOWNLOAD_RETRIES = 5
+# Seconds a download may stall before the attempt fails and is retried
+DOWNLOAD_TIMEOUT = 60
+DORY_MANIFEST = ".dory_manifest.json"
+# Largest table the Dynamic Dory parameters support
+DORY_MAX_TABLE_SIZE = 10_000_000
+# Scheme names as the benchmark binary reports them in its results
+SCHEME_TITLES = {"hyper-kzg": "HyperKZG", "dynamic-dory": "Dynamic Dory"}
+DEFAULT_ITERATIONS = 3
+# Every query `-q all` runs, in the order of `all_queries()` in `src/utils/queries.rs`
+ALL_QUERIES = (
+    "filter", "complex-filter", "arithmetic", "group-by", "aggregate", "boolean-filter", "large-column-set",
+    "complex-condition", "sum-count", "coin", "join", "union-all", "limit-offset", "not"
+)
+# Free space to keep for the build, results and logs on top of any parameter downloads
+DISK_HEADROOM_BYTES = 2 << 30
+# Rough memory needed per table row to generate, commit to and prove a benchmark table
+MEMORY_BYTES_PER_ROW = 1 << 10
+CSV_HEADER = ["commitment_scheme", "query", "table_size", "generate_proof (ms)", "verify_proof (ms)", "iteration"]
 
+@dataclass(frozen=True, slots=True)
 class BenchmarkConfig:
-    def __init__(self, queries: List[str], table_sizes: List[int], 
-                 run_dynamic_dory: bool, flags: str):
-        self.queries = queries
-        self.table_sizes = table_sizes
-        self.run_dynamic_dory = run_dynamic_dory
-        self.flags = flags
+    queries: Tuple[str, ...]
+    table_sizes: Tuple[int, ...]
+    run_dynamic_dory: bool
+    flag_args: Tuple[str, ...]
+    dory_table_sizes: Tuple[int, ...] = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "dory_table_sizes",
+                           tuple(size for size in self.table_sizes if size <= DORY_MAX_TABLE_SIZE))
+
+@dataclass(frozen=True, slots=True)
+class BenchmarkPaths:
+    project_root: Path
+    data_dir: Path
+    csv_path: Path
+    log_dir: Path
+
+class ResultsWriter:
+    """Appends benchmark result rows to the results CSV, writing the header only once."""
+    def __init__(self, csv_path: Path):
+        self.file = open(csv_path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(CSV_HEADER)
+        self.file.flush()
+
+    def write_rows(self, rows: List[List[str]]):
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
 
 def get_benchmark_config(mode: str) -> BenchmarkConfig:
     """Get benchmark configuration based on mode."""
     if mode == 'd':
         return BenchmarkConfig(
-            queries=["filter", "arithmetic", "group-by", "join"],
-            table_sizes=[10000, 100000, 1000000, 10000000, 100000000],
+            queries=("filter", "arithmetic", "group-by", "join"),
+            table_sizes=(10000, 100000, 1000000, 10000000, 100000000),
             run_dynamic_dory=True,
-            flags=""
+            flag_args=()
         )
     elif mode == 'm':
         return BenchmarkConfig(
-            queries=["filter", "complex-filter", "group-by", "join"],
-            table_sizes=[
+            queries=("filter", "complex-filter", "group-by", "join"),
+            table_sizes=(
                 10000, 20000, 30000, 40000, 50000, 60000, 70000, 80000, 90000, 100000,
                 110000, 120000, 130000, 140000, 150000, 160000, 170000, 180000, 190000,
                 200000, 400000, 600000, 800000, 1000000, 3000000, 6000000, 10000000
-            ],
+            ),
             run_dynamic_dory=False,
-            flags="-r 0 -i 10"
+            flag_args=("-r", "0", "-i", "10")
         )
     elif mode == 'a':
         return BenchmarkConfig(
-            queries=["all"],
-            table_sizes=[10000, 100000, 1000000, 10000000, 100000000],
+            queries=ALL_QUERIES,
+            table_sizes=(10000, 100000, 1000000, 10000000, 100000000),
             run_dynamic_dory=True,
-            flags=""
+            flag_args=()
         )
     else:
-        print(f"Unknown mode: {mode}")
+        logging.error(f"Unknown mode: {mode}")
         sys.exit(1)
 
-def setup_environment() -> Tuple[Path, Path, Path]:
+def setup_environment() -> BenchmarkPaths:
     """Set up the environment and return important paths."""
     script_path = Path(os.path.dirname(os.path.realpath(__file__)))
     project_root = script_path.parent.parent.parent
@@ -64,120 +120,354 @@ def setup_environment() -> Tuple[Path, Path, Path]:
     # Set up CSV output path as results_<timestamp>.csv
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     csv_path = data_dir / f"results_{timestamp}.csv"
-    os.environ["CSV_PATH"] = str(csv_path)
-    print(f"Saving results at: {csv_path}")
+    logging.info(f"Saving results at: {csv_path}")
+
+    # Keep the full output of every benchmark run alongside the results
+    log_dir = data_dir / f"results_{timestamp}_logs"
+    log_dir.mkdir(exist_ok=True)
     
-    return project_root, data_dir, csv_path
+    return BenchmarkPaths(project_root=project_root, data_dir=data_dir, csv_path=csv_path, log_dir=log_dir)
 
-def run_command(cmd: List[str], check: bool = True) -> bool:
+def run_command(cmd: List[str], check: bool = True, env: Optional[Dict[str, str]] = None,
+                cwd: Optional[Path] = None) -> bool:
     """Run a shell command and handle errors appropriately."""
     try:
-        subprocess.run(cmd, check=check)
+        subprocess.run(cmd, check=check, env=env, cwd=cwd)
         return True
     except subprocess.CalledProcessError:
-        print(f"ERROR: Command failed: {' '.join(cmd)}")
+        logging.error(f"Command failed: {' '.join(cmd)}")
         return False
 
-def download_dory_files(data_dir: Path) -> bool:
-    """Download and prepare Dynamic Dory files."""
-    download_success = True
+def parse_result_rows(output: str) -> List[List[str]]:
+    """Extract the CSV result rows the benchmark binary prints to stdout."""
+    return [row for row in csv.reader(output.splitlines())
+            if len(row) == len(CSV_HEADER) and all(value.isdigit() for value in row[2:])]
+
+def query_title(query: str) -> str:
+    """Convert a query's command-line name (e.g. `group-by`) to the title the binary reports."""
+    return query.replace('-', ' ').title()
+
+def benchmark_iterations(flag_args: Tuple[str, ...]) -> int:
+    """Get the number of iterations each benchmark run performs with the given flags."""
+    for flag, value in zip(flag_args, flag_args[1:]):
+        if flag in ("-i", "--iterations"):
+            return int(value)
+    return DEFAULT_ITERATIONS
+
+def load_completed_cells(resume_path: Path, iterations: int) -> Dict[Tuple[str, str, int], List[List[str]]]:
+    """Read a previous results CSV and return the rows of every fully benchmarked cell."""
+    cells: Dict[Tuple[str, str, int], List[List[str]]] = {}
+    with open(resume_path, newline='') as infile:
+        for row in parse_result_rows(infile.read()):
+            cells.setdefault((row[0], row[1], int(row[2])), []).append(row)
+    # A cell interrupted part way through its iterations is run again from scratch
+    return {cell: rows for cell, rows in cells.items() if len({row[5] for row in rows}) >= iterations}
+
+def run_benchmark(cmd: List[str], cwd: Path, log_path: Path, echo: bool) -> List[List[str]]:
+    """Run a single benchmark command, logging its output, and return the result rows it reported."""
+    # The driver owns the results CSV, so keep the binary from appending to one of its own
+    env = {key: value for key, value in os.environ.items() if key != "CSV_PATH"}
+    logging.debug(f"Running {' '.join(cmd)}")
+    lines = []
+    with open(log_path, 'w') as log, subprocess.Popen(cmd, env=env, cwd=cwd, stdout=subprocess.PIPE,
+                                                      stderr=subprocess.STDOUT, text=True, bufsize=1) as proc:
+        # Drain the pipe as the binary writes so it never blocks on a full pipe buffer
+        for line in proc.stdout:
+            log.write(line)
+            if echo:
+                sys.stdout.write(line)
+            lines.append(line)
+    if proc.returncode != 0:
+        logging.error(f"Command failed: {' '.join(cmd)} (see {log_path})")
+    return parse_result_rows("".join(lines))
+
+def available_memory() -> Optional[int]:
+    """Get the memory available to new processes in bytes, if it can be determined."""
+    try:
+        import psutil
+        return psutil.virtual_memory().available
+    except ImportError:
+        pass
+    try:
+        with open("/proc/meminfo") as infile:
+            for line in infile:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+class _HeadRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """Follow redirects without turning a HEAD request into a GET, as urllib does by default."""
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        new_req = super().redirect_request(req, fp, code, msg, headers, newurl)
+        if new_req is not None:
+            new_req.method = req.get_method()
+        return new_req
+
+def remote_size(url: str) -> Optional[int]:
+    """Get the Content-Length of a download with a HEAD request, if the server reports one."""
+    request = urllib.request.Request(url, method="HEAD")
+    try:
+        with urllib.request.build_opener(_HeadRedirectHandler).open(request, timeout=DOWNLOAD_TIMEOUT) as response:
+            length = response.headers.get("Content-Length")
+            return int(length) if length is not None else None
+    except (OSError, http.client.HTTPException, ValueError) as e:
+        logging.debug(f"HEAD request for {url} failed: {e}")
+        return None
+
+def dory_download_size(name: str) -> Optional[int]:
+    """Get the size of a Dynamic Dory parameter file from the release, summing its parts if it is split."""
+    urls = ([f"{DORY_PARAMS_URL}/{name}.part.{part}" for part in BLITZAR_HANDLE_PARTS]
+            if name == BLITZAR_HANDLE else [f"{DORY_PARAMS_URL}/{name}"])
+    total = 0
+    for url in urls:
+        size = remote_size(url)
+        if size is None:
+            return None
+        total += size
+    return total
+
+def preflight(config: BenchmarkConfig, data_dir: Path, jobs: int = 1):
+    """Fail fast if the machine is unlikely to have the disk or memory the benchmarks need."""
+    needed_disk = DISK_HEADROOM_BYTES
+    if config.run_dynamic_dory:
+        # Files that still need downloading are briefly on disk twice: as parts and combined
+        manifest = load_dory_manifest(data_dir)
+        for name in (BLITZAR_HANDLE, PUBIC_PARAMETERS):
+            if (data_dir / name).exists():
+                continue
+            size = manifest[name]["size"] if name in manifest else dory_download_size(name)
+            if size is None:
+                logging.warning(f"Could not determine the download size of {name}, so the disk check "
+                                f"only covers {DISK_HEADROOM_BYTES} bytes of headroom, not its download")
+            else:
+                needed_disk += 2 * size
+    free_disk = shutil.disk_usage(data_dir).free
+    if free_disk < needed_disk:
+        logging.error(f"Need {needed_disk} bytes free in {data_dir}, but only {free_disk} are available")
+        sys.exit(1)
+
+    # The per-row estimate is coarse, so a shortfall is only reported rather than treated as fatal.
+    # Runs are dispatched largest first, so up to `jobs` of the largest benchmarks run at once.
+    needed_memory = max(config.table_sizes) * MEMORY_BYTES_PER_ROW * jobs
+    free_memory = available_memory()
+    if free_memory is not None and free_memory < needed_memory:
+        logging.warning(f"{jobs} concurrent run(s) of the largest benchmark may need about {needed_memory} bytes "
+                        f"of memory, but only {free_memory} are available")
+
+def build_benchmarks(project_root: Path, update_deps: bool) -> Path:
+    """Build the benchmark binary once and return its path."""
+    cmd = ["cargo", "build", "--release", "--bin", BENCH_BINARY]
+    if update_deps:
+        run_command(["cargo", "update"], cwd=project_root)
+    elif (project_root / "Cargo.lock").exists():
+        # Build against the existing lock file so every backend and rerun benchmarks the same dependencies
+        cmd.append("--locked")
+    if not run_command(cmd, cwd=project_root):
+        logging.error("Build failed. Cannot run benchmarks.")
+        sys.exit(1)
+    # A relative CARGO_TARGET_DIR is resolved against the directory cargo ran in
+    target_dir = project_root / os.environ.get("CARGO_TARGET_DIR", "target")
+    return target_dir / "release" / BENCH_BINARY
+
+def configure_logging(level: int):
+    """Send progress messages to a single stderr stream at the given level."""
+    logging.basicConfig(level=level, format='%(asctime)s %(levelname)s %(message)s')
+
+def run_benchmark_commands(runs: List[Tuple[List[str], Path]], results: ResultsWriter, jobs: int, cwd: Path):
+    """Run (command, log path) pairs, up to `jobs` at a time, appending their results to the CSV as they finish."""
+    if jobs <= 1:
+        echo = logging.getLogger().isEnabledFor(logging.INFO)
+        for cmd, log_path in runs:
+            results.write_rows(run_benchmark(cmd, cwd, log_path, echo))
+        return
+
+    # Parallel runs would interleave on the console, so their output only goes to the logs
+    level = logging.getLogger().getEffectiveLevel()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=configure_logging, initargs=(level,)) as executor:
+        futures = [executor.submit(run_benchmark, cmd, cwd, log_path, False) for cmd, log_path in runs]
+        for future in as_completed(futures):
+            results.write_rows(future.result())
+
+def download_file(url: str, dest_path: Path) -> bool:
+    """Stream a file to disk, retrying with exponential backoff on failure."""
+    tmp_path = dest_path.with_name(dest_path.name + ".tmp")
+    for attempt in range(1, DOWNLOAD_RETRIES + 1):
+        try:
+            with urllib.request.urlopen(url, timeout=DOWNLOAD_TIMEOUT) as response, open(tmp_path, 'wb') as outfile:
+                shutil.copyfileobj(response, outfile, 1 << 20)
+            os.replace(tmp_path, dest_path)
+            logging.info(f"Downloaded {dest_path.name}")
+            return True
+        except (OSError, http.client.HTTPException) as e:
+            # HTTPException covers truncated transfers (IncompleteRead), which are not OSErrors
+            logging.warning(f"Download of {url} failed (attempt {attempt}/{DOWNLOAD_RETRIES}): {e}")
+            if attempt < DOWNLOAD_RETRIES:
+                time.sleep(2 ** attempt)
+    # Don't leave a partial download behind
+    tmp_path.unlink(missing_ok=True)
+    logging.error(f"Could not download {url}")
+    return False
+
+def append_file(infile, outfile):
+    """Append the contents of one unbuffered file to another, copying in-kernel where supported."""
+    if hasattr(os, "sendfile"):
+        in_fd, out_fd = infile.fileno(), outfile.fileno()
+        remaining = os.fstat(in_fd).st_size
+        try:
+            while remaining > 0:
+                sent = os.sendfile(out_fd, in_fd, None, remaining)
+                if sent == 0:
+                    break
+                remaining -= sent
+            return
+        except OSError:
+            # Platforms such as macOS only support sendfile to sockets; both file offsets have
+            # advanced past whatever was sent, so the buffered copy below picks up from there
+            pass
+    shutil.copyfileobj(infile, outfile, 1 << 22)
+
+def sha256_file(path: Path) -> str:
+    """Compute the hex SHA-256 digest of a file."""
+    with open(path, 'rb') as infile:
+        if hasattr(hashlib, "file_digest"):
+            # Python 3.11+ hashes the file inside OpenSSL, using SHA extensions where the CPU has them
+            return hashlib.file_digest(infile, "sha256").hexdigest()
+        digest = hashlib.sha256()
+        while chunk := infile.read(1 << 22):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+def load_dory_manifest(data_dir: Path) -> Dict[str, Dict]:
+    """Load the recorded sizes and digests of previously downloaded parameter files."""
+    try:
+        with open(data_dir / DORY_MANIFEST) as infile:
+            return json.load(infile)
+    except (OSError, ValueError):
+        return {}
+
+def is_file_intact(path: Path, manifest: Dict[str, Dict], verify_hash: bool) -> bool:
+    """Check whether a parameter file exists and matches its manifest entry."""
+    if not path.exists():
+        return False
+    expected = manifest.get(path.name)
+    if expected is None:
+        # Placed by hand rather than downloaded by this script, so there is nothing to check against
+        return True
+    if path.stat().st_size != expected["size"]:
+        return False
+    return not verify_hash or sha256_file(path) == expected["sha256"]
+
+def download_dory_files(data_dir: Path, verify_hash: bool = False) -> bool:
+    """Download and prepare Dynamic Dory files, skipping any that are already intact."""
     blitzar_handle_path = data_dir / BLITZAR_HANDLE
     public_params_path = data_dir / PUBIC_PARAMETERS
-    
-    # Check if required files exist, download if not
-    if not blitzar_handle_path.exists() or not public_params_path.exists():
-        print("Downloading required parameter files...")
-        os.chdir(data_dir)
-        
-        # Download Blitzar handle parts
-        for part in ['aa', 'ab', 'ac', 'ad']:
-            url = f"https://github.com/spaceandtimelabs/sxt-proof-of-sql/releases/download/dory-prover-params-nu-16/blitzar_handle_nu_16.bin.part.{part}"
-            if not run_command(["wget", "-q", "--show-progress", url]):
-                download_success = False
-                break
-        
-        # Download public parameters if Blitzar handle parts download succeeded
-        if download_success:
-            url = "https://github.com/spaceandtimelabs/sxt-proof-of-sql/releases/download/dory-prover-params-nu-16/public_parameters_nu_16.bin"
-            if not run_command(["wget", "-q", "--show-progress", url]):
-                download_success = False
-        
-        # Combine Blitzar handle parts if downloads succeeded
-        if download_success:
-            print("Combining parts into blitzar_handle_nu_16.bin...")
-            try:
-                with open(blitzar_handle_path, 'wb') as outfile:
-                    for part in ['aa', 'ab', 'ac', 'ad']:
-                        part_file = data_dir / f"blitzar_handle_nu_16.bin.part.{part}"
-                        with open(part_file, 'rb') as infile:
-                            shutil.copyfileobj(infile, outfile)
-            except Exception as e:
-                print(f"ERROR: Failed to combine file parts: {e}")
-                download_success = False
-            
-            # Clean up part files if combination was successful
-            if download_success:
-                for part in ['aa', 'ab', 'ac', 'ad']:
-                    part_file = data_dir / f"blitzar_handle_nu_16.bin.part.{part}"
-                    try:
-                        os.remove(part_file)
-                    except Exception:
-                        print(f"Warning: Could not remove part file {part_file}")
-        
+    manifest = load_dory_manifest(data_dir)
+    need_handle = not is_file_intact(blitzar_handle_path, manifest, verify_hash)
+    need_params = not is_file_intact(public_params_path, manifest, verify_hash)
+    if not need_handle and not need_params:
+        return True
+
+    logging.info("Downloading required parameter files...")
+
+    # Download the Blitzar handle parts and/or the public parameters concurrently
+    downloads = []
+    if need_handle:
+        downloads.extend((f"{DORY_PARAMS_URL}/{BLITZAR_HANDLE}.part.{part}", data_dir / f"{BLITZAR_HANDLE}.part.{part}")
+                         for part in BLITZAR_HANDLE_PARTS)
+    if need_params:
+        downloads.append((f"{DORY_PARAMS_URL}/{PUBIC_PARAMETERS}", public_params_path))
+    with ThreadPoolExecutor(max_workers=len(downloads)) as executor:
+        download_success = all(executor.map(lambda download: download_file(*download), downloads))
+
+    # Combine Blitzar handle parts if downloads succeeded
+    if download_success and need_handle:
+        logging.info(f"Combining parts into {BLITZAR_HANDLE}...")
+        # Stitch into a temporary file so an interrupted run never leaves a truncated handle behind
+        tmp_path = blitzar_handle_path.with_name(BLITZAR_HANDLE + ".tmp")
+        try:
+            with open(tmp_path, 'wb', buffering=0) as outfile:
+                for part in BLITZAR_HANDLE_PARTS:
+                    part_file = data_dir / f"{BLITZAR_HANDLE}.part.{part}"
+                    with open(part_file, 'rb', buffering=0) as infile:
+                        append_file(infile, outfile)
+            os.replace(tmp_path, blitzar_handle_path)
+        except Exception as e:
+            logging.error(f"Failed to combine file parts: {e}")
+            download_success = False
+
+        # Clean up part files if combination was successful
         if download_success:
-            print("Download complete.")
-        else:
-            print("Download failed. Cannot run Dynamic Dory benchmarks.")
-    
+            for part in BLITZAR_HANDLE_PARTS:
+                part_file = data_dir / f"{BLITZAR_HANDLE}.part.{part}"
+                try:
+                    os.remove(part_file)
+                except Exception:
+                    logging.warning(f"Could not remove part file {part_file}")
+
+    if download_success:
+        # Record what was downloaded so later runs can skip intact files
+        for path, needed in ((blitzar_handle_path, need_handle), (public_params_path, need_params)):
+            if needed:
+                manifest[path.name] = {"size": path.stat().st_size, "sha256": sha256_file(path)}
+        try:
+            with open(data_dir / DORY_MANIFEST, 'w') as outfile:
+                json.dump(manifest, outfile, indent=2)
+        except OSError as e:
+            logging.warning(f"Could not write {DORY_MANIFEST}: {e}")
+        logging.info("Download complete.")
+    else:
+        logging.error("Download failed. Cannot run Dynamic Dory benchmarks.")
+
     return download_success and blitzar_handle_path.exists() and public_params_path.exists()
 
-def run_hyper_kzg_benchmarks(project_root: Path, config: BenchmarkConfig):
-    """Run Hyper-KZG benchmarks."""
-    print("Running Hyper-KZG benchmarks...")
-    os.chdir(project_root)
-    run_command(["cargo", "clean"])
-    run_command(["cargo", "update"])
-    
-    for table_size in config.table_sizes:
+def run_backend(backend: str, paths: BenchmarkPaths, bench_binary: Path, results: ResultsWriter,
+                config: BenchmarkConfig, table_sizes: Tuple[int, ...], jobs: int,
+                completed: Dict[Tuple[str, str, int], List[List[str]]]):
+    """Run every (table_size, query) benchmark for one commitment scheme that has not already completed."""
+    logging.info(f"Running {backend} benchmarks...")
+
+    table_sizes = list(table_sizes)
+    if jobs > 1:
+        # Dispatch the largest tables first so the longest runs don't finish last on an otherwise idle pool
+        table_sizes.sort(reverse=True)
+    base_args = (str(bench_binary), "-s", backend)
+    runs = []
+    for table_size in table_sizes:
         for query in config.queries:
-            cmd = ["cargo", "run", "--release", "--bin", "proof-of-sql-benches", 
-                  "--", "-s", "hyper-kzg", "-t", str(table_size), "-q", query]
-            if config.flags:
-                cmd.extend(config.flags.split())
-            run_command(cmd)
-
-def run_dynamic_dory_benchmarks(project_root: Path, data_dir: Path, config: BenchmarkConfig):
-    """Run Dynamic Dory benchmarks if possible."""
-    if not config.run_dynamic_dory:
-        print("Skipping Dynamic Dory benchmarks (not requested)")
-        return
-        
-    print("Running Dynamic Dory benchmarks...")
-    
-    # Download necessary files
-    if not download_dory_files(data_dir):
+            cell = (SCHEME_TITLES[backend], query_title(query), table_size)
+            if cell in completed:
+                logging.info(f"Skipping {backend} {query} with table size {table_size} (already completed)")
+                results.write_rows(completed[cell])
+                continue
+            cmd = [*base_args, "-t", str(table_size), "-q", query, *config.flag_args]
+            runs.append((cmd, paths.log_dir / f"{backend}_{query}_{table_size}.log"))
+    run_benchmark_commands(runs, results, jobs, paths.project_root)
+
+def warm_page_cache(paths: List[Path]):
+    """Ask the kernel to start reading files into the page cache ahead of their first use."""
+    if not hasattr(os, "posix_fadvise"):
         return
-    
-    # Set environment variables for Dynamic Dory
-    os.environ["BLITZAR_HANDLE_PATH"] = str(data_dir / BLITZAR_HANDLE)
-    os.environ["DORY_PUBLIC_PARAMS_PATH"] = str(data_dir / PUBIC_PARAMETERS)
-    
-    # Filter table sizes for Dynamic Dory (10,000,000 max)
-    dory_table_sizes = [size for size in config.table_sizes if size <= 10000000]
-    
-    # Run the Dynamic Dory benchmarks
-    os.chdir(project_root)
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            logging.warning(f"Could not prefetch {path}: {e}")
 
-    run_command(["cargo", "clean"])
-    run_command(["cargo", "update"])
+def prepare_dynamic_dory(data_dir: Path, verify_params: bool) -> bool:
+    """Fetch the Dynamic Dory parameter files and point the benchmark binary at them."""
+    if not download_dory_files(data_dir, verify_params):
+        return False
 
-    for table_size in dory_table_sizes:
-        for query in config.queries:
-            cmd = ["cargo", "run", "--release", "--bin", "proof-of-sql-benches", 
-                  "--", "-s", "dynamic-dory", "-t", str(table_size), "-q", query]
-            if config.flags:
-                cmd.extend(config.flags.split())
-            run_command(cmd)
+    os.environ["BLITZAR_HANDLE_PATH"] = str(data_dir / BLITZAR_HANDLE)
+    os.environ["DORY_PUBLIC_PARAMS_PATH"] = str(data_dir / PUBIC_PARAMETERS)
+    warm_page_cache([data_dir / BLITZAR_HANDLE, data_dir / PUBIC_PARAMETERS])
+    return True
 
 def main():
     # Begin benchmark timer
@@ -187,18 +477,54 @@ def main():
     parser = argparse.ArgumentParser(description='Run proof-of-sql-benches')
     parser.add_argument('mode', nargs='?', choices=['d', 'daily', 'm', 'marketing', 'a', 'all'], 
                         default='a', help='Benchmark mode to run')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of benchmarks to run in parallel (capped at the CPU count; '
+                             'parallel runs compete for cores and will inflate timings)')
+    parser.add_argument('--update-deps', '--allow-cargo-update', action='store_true',
+                        help='Run `cargo update` before building the benchmarks; by default an existing '
+                             'Cargo.lock is used as-is (`--locked`)')
+    parser.add_argument('--verify-params', action='store_true',
+                        help='Check the SHA-256 of previously downloaded Dory parameter files before reusing them')
+    parser.add_argument('--resume-from', type=Path, metavar='PATH',
+                        help='Results CSV of an interrupted run; benchmarks it completed are '
+                             'copied over instead of rerun')
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument('-q', '--quiet', action='store_const', dest='log_level', const=logging.WARNING,
+                           default=logging.INFO, help='Only report warnings and errors')
+    verbosity.add_argument('-v', '--verbose', action='store_const', dest='log_level', const=logging.DEBUG,
+                           help='Report debugging detail')
     args = parser.parse_args()
+    configure_logging(args.log_level)
+    jobs = max(1, min(args.jobs, os.cpu_count() or 1))
     
     # Get mode and benchmark configuration
     benchmark_mode = args.mode[0]
     config = get_benchmark_config(benchmark_mode)
     
     # Setup environment 
-    project_root, data_dir, csv_path = setup_environment()
+    paths = setup_environment()
+    preflight(config, paths.data_dir, jobs)
+
+    # Build the benchmark binary once so every run reuses it
+    bench_binary = build_benchmarks(paths.project_root, args.update_deps)
     
+    # Load the benchmarks an earlier run already completed
+    completed = {}
+    if args.resume_from:
+        completed = load_completed_cells(args.resume_from, benchmark_iterations(config.flag_args))
+        logging.info(f"Resuming from {args.resume_from} ({len(completed)} completed benchmarks)")
+
     # Run benchmarks
-    run_hyper_kzg_benchmarks(project_root, config)
-    run_dynamic_dory_benchmarks(project_root, data_dir, config)
+    results = ResultsWriter(paths.csv_path)
+    try:
+        run_backend("hyper-kzg", paths, bench_binary, results, config, config.table_sizes, jobs, completed)
+        if not config.run_dynamic_dory:
+            logging.info("Skipping Dynamic Dory benchmarks (not requested)")
+        elif prepare_dynamic_dory(paths.data_dir, args.verify_params):
+            run_backend("dynamic-dory", paths, bench_binary, results, config, config.dory_table_sizes, jobs,
+                        completed)
+    finally:
+        results.close()
 
     # End benchmark timer
     end_time = time.time()
@@ -206,8 +532,8 @@ def main():
     hours, remainder = divmod(execution_time, 3600)
     minutes, seconds = divmod(remainder, 60)
     
-    print(f"All benchmarks completed. Results saved to: {csv_path}")
-    print(f"Total execution time: {int(hours):02d}:{int(minutes):02d}:{seconds:.2f}")
+    logging.info(f"All benchmarks completed. Results saved to: {paths.csv_path}")
+    logging.info(f"Total execution time: {int(hours):02d}:{int(minutes):02d}:{seconds:.2f}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests for the benchmark driver's download and preflight helpers.
+"""
+
+import io
+import pytest
+import run_benchmarks
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    """Skip the sleeps between download attempts."""
+    monkeypatch.setattr(run_benchmarks.time, "sleep", lambda seconds: None)
+
+
+def test_download_file_retries_after_timeout(tmp_path, monkeypatch):
+    """Test that a stalled download times out and the next attempt succeeds."""
+    calls = []
+
+    def fake_urlopen(url, timeout=None):
+        calls.append(timeout)
+        if len(calls) == 1:
+            raise TimeoutError("timed out")
+        return io.BytesIO(b"parameters")
+
+    monkeypatch.setattr(run_benchmarks.urllib.request, "urlopen", fake_urlopen)
+    dest_path = tmp_path / "params.bin"
+
+    assert run_benchmarks.download_file("https://example.invalid/params.bin", dest_path)
+    assert calls == [run_benchmarks.DOWNLOAD_TIMEOUT] * 2
+    assert dest_path.read_bytes() == b"parameters"
+    assert not (tmp_path / "params.bin.tmp").exists()
+
+
+def test_head_redirect_keeps_method():
+    """Test that following a release redirect does not turn the size check into a download."""
+    request = run_benchmarks.urllib.request.Request(
+        "https://example.invalid/params.bin", method="HEAD"
+    )
+    redirected = run_benchmarks._HeadRedirectHandler().redirect_request(
+        request, None, 302, "Found", {}, "https://cdn.example.invalid/params.bin"
+    )
+    assert redirected.get_method() == "HEAD"
+
+
+def test_preflight_checks_download_sizes_without_manifest(tmp_path, monkeypatch):
+    """Test that a first run aborts when the released files do not fit on disk."""
+    part_size = 1 << 30
+    monkeypatch.setattr(run_benchmarks, "remote_size", lambda url: part_size)
+    monkeypatch.setattr(run_benchmarks, "available_memory", lambda: None)
+    config = run_benchmarks.get_benchmark_config("d")
+    # Four handle parts plus the public parameters, each on disk twice, plus headroom
+    needed = run_benchmarks.DISK_HEADROOM_BYTES + 2 * 5 * part_size
+
+    usage = run_benchmarks.shutil.disk_usage(tmp_path)
+    monkeypatch.setattr(
+        run_benchmarks.shutil,
+        "disk_usage",
+        lambda path: usage._replace(free=needed - 1),
+    )
+    with pytest.raises(SystemExit):
+        run_benchmarks.preflight(config, tmp_path)
+
+    monkeypatch.setattr(
+        run_benchmarks.shutil, "disk_usage", lambda path: usage._replace(free=needed)
+    )
+    run_benchmarks.preflight(config, tmp_path)
@@ -3,109 +3,208 @@
 Tests for YulPreprocessor demonstrating preprocessing capabilities.
 """
 
+import re
+import shutil
+from collections import Counter
 from pathlib import Path
 import pytest
-from yul_preprocessor import YulPreprocessor, YulFunction
+import yul_preprocessor
+from yul_preprocessor import YulPreprocessor, YulFunction, _find_presl_files, main
+
+_TEST_FILES_DIR = Path(__file__).resolve().parent / "test_files"
+
+# Solidity import statements that still reference a .presl file
+_PRESL_IMPORT_RE = re.compile(r'import\s+(?:.*?\s+from\s+)?["\'][^"\']*?\.presl["\']')
+_FUNCTION_DEF_RE = re.compile(r"function\s+(\w+)\s*\(")
+# Markers whose relative order test_slither_comments_preserved checks
+_SLITHER_MARKERS_RE = re.compile(
+    r"// slither-disable-start cyclomatic-complexity"
+    r"|function exclude_coverage_start_complexFunction"
+    r"|function complexFunction"
+    r"|function exclude_coverage_stop_complexFunction"
+    r"|// slither-disable-end cyclomatic-complexity"
+)
+
+
+def _count_function_defs(text):
+    """Count how many times each Yul function is defined in a single pass over the text."""
+    return Counter(_FUNCTION_DEF_RE.findall(text))
+
+
+def _defined_funcs(text):
+    """Collect the names of all functions defined in the text."""
+    return set(_FUNCTION_DEF_RE.findall(text))
+
+
+@pytest.fixture(scope="session")
+def preprocessor_pool():
+    """
+    Hand out one YulPreprocessor per test directory, shared across the session.
+    Only for tests whose output does not depend on earlier state, i.e. no cycles or error paths.
+    """
+    pool = {}
+
+    def get(test_dir):
+        if test_dir not in pool:
+            pool[test_dir] = YulPreprocessor(root_dir=test_dir)
+        return pool[test_dir]
+
+    return get
+
+
+@pytest.fixture(scope="session")
+def process_cached(preprocessor_pool):
+    """Process each (test directory, file) pair once and reuse the output across tests."""
+    cache = {}
+
+    def process(test_dir, file_path):
+        key = (test_dir, file_path)
+        if key not in cache:
+            cache[key] = preprocessor_pool(test_dir).process_file(file_path)
+        return cache[key]
+
+    return process
+
+
+@pytest.fixture
+def fresh_preprocessor():
+    """Create a new YulPreprocessor for every call, so no cache state is shared."""
+
+    def create(test_dir):
+        return YulPreprocessor(root_dir=test_dir)
+
+    return create
+
+
+@pytest.fixture(scope="session")
+def basic_import_result(process_cached):
+    """Processed output of basic_import/main.presl."""
+    test_dir = _TEST_FILES_DIR / "basic_import"
+    return process_cached(test_dir, test_dir / "main.presl")
+
+
+@pytest.fixture(scope="session")
+def calculator_result(process_cached):
+    """Processed output of multiple_imports/calculator.presl."""
+    test_dir = _TEST_FILES_DIR / "multiple_imports"
+    return process_cached(test_dir, test_dir / "calculator.presl")
+
+
+@pytest.fixture
+def circular_ab_results(fresh_preprocessor):
+    """Processed outputs of the a.presl/b.presl cycle in circular_regular, from a fresh preprocessor."""
+    test_dir = _TEST_FILES_DIR / "circular_regular"
+    preprocessor = fresh_preprocessor(test_dir)
+    return (
+        preprocessor.process_file(test_dir / "a.presl"),
+        preprocessor.process_file(test_dir / "b.presl"),
+    )
 
 
 class TestYulPreprocessor:
     """Test suite for YulPreprocessor."""
 
-    def setup_method(self):
-        """Set up test paths."""
-        self.test_files_dir = Path(__file__).parent / "test_files"
+    test_files_dir = _TEST_FILES_DIR
 
-    def test_basic_import_preprocessing(self):
+    def test_basic_import_preprocessing(self, basic_import_result):
         """Test basic import statement preprocessing."""
-        test_dir = self.test_files_dir / "basic_import"
-        target_file = test_dir / "main.presl"
-
-        # Process the target file
-        preprocessor = YulPreprocessor(root_dir=test_dir)
-        result = preprocessor.process_file(target_file)
+        result = basic_import_result
 
         # Verify the function was imported
         assert "function add5(x) -> result" in result
         assert "result := add(x, 5)" in result
         assert "// import add5 from utils.presl" not in result
 
-    def test_multiple_imports(self):
+    def test_multiple_imports(self, calculator_result):
         """Test importing multiple functions."""
-        test_dir = self.test_files_dir / "multiple_imports"
-        target_file = test_dir / "calculator.presl"
-
-        preprocessor = YulPreprocessor(root_dir=test_dir)
-        result = preprocessor.process_file(target_file)
+        result = calculator_result
 
         # Verify both functions were imported
         assert "function multiply(a, b) -> result" in result
         assert "function divide(a, b) -> result" in result
-        assert result.count("function multiply") == 1
-        assert result.count("function divide") == 1
+        counts = _count_function_defs(result)
+        assert counts["multiply"] == 1
+        assert counts["divide"] == 1
 
-    def test_relative_path_import(self):
+    def test_relative_path_import(self, preprocessor_pool):
         """Test importing with relative paths."""
         test_dir = self.test_files_dir / "relative_path_import"
         main_file = test_dir / "main_with_relative_import.presl"
 
-        preprocessor = YulPreprocessor(root_dir=test_dir)
+        preprocessor = preprocessor_pool(test_dir)
         result = preprocessor.process_file(main_file)
 
         assert "function double(x) -> result" in result
         assert "result := mul(x, 2)" in result
 
-    def test_function_deduplication(self):
+    def test_function_deduplication(self, preprocessor_pool):
         """Test that duplicate function imports are deduplicated."""
         test_dir = self.test_files_dir / "function_deduplication"
         target_file = test_dir / "main_dedup.presl"
 
-        preprocessor = YulPreprocessor(root_dir=test_dir)
+        preprocessor = preprocessor_pool(test_dir)
         result = preprocessor.process_file(target_file)
 
         # Should only have one definition
-        assert result.count("function square(x) -> result") == 1
+        assert "function square(x) -> result" in result
+        assert _count_function_defs(result)["square"] == 1
 
-    def test_circular_minimal_allowed(self):
+    def test_circular_minimal_allowed(self, circular_ab_results):
         """Test that circular dependencies are now allowed and handled correctly."""
-        test_dir = self.test_files_dir / "circular_regular"
-        file_a = test_dir / "a.presl"
-        file_b = test_dir / "b.presl"
-
-        preprocessor = YulPreprocessor(root_dir=test_dir)
-
-        # Process both files - should not raise an error
-        result_a = preprocessor.process_file(file_a)
-        result_b = preprocessor.process_file(file_b)
+        # Processing both files should not raise an error
+        result_a, result_b = circular_ab_results
 
         # Both files should have both funcA and funcB in their assembly blocks
-        assert "function funcA() -> result" in result_a
-        assert "function funcB() -> result" in result_b
-        assert "function funcA() -> result" in result_b
-        assert "function funcB() -> result" in result_a
+        assert {"funcA", "funcB"} <= _defined_funcs(result_a)
+        assert {"funcA", "funcB"} <= _defined_funcs(result_b)
 
         # Verify both files have access to all functions in the cycle
         # Note: functions may appear multiple times (original + imported)
-        assert result_a.count("function funcA") >= 1
-        assert result_a.count("function funcB") >= 1
-        assert result_b.count("function funcA") >= 1
-        assert result_b.count("function funcB") >= 1
-
-    def test_missing_function_error(self):
+        counts_a = _count_function_defs(result_a)
+        counts_b = _count_function_defs(result_b)
+        assert counts_a["funcA"] >= 1
+        assert counts_a["funcB"] >= 1
+        assert counts_b["funcA"] >= 1
+        assert counts_b["funcB"] >= 1
+
+    def test_missing_function_error(self, fresh_preprocessor):
         """Test error when importing non-existent function."""
         test_dir = self.test_files_dir / "missing_function"
         target_file = test_dir / "target.presl"
 
-        preprocessor = YulPreprocessor(root_dir=test_dir)
+        preprocessor = fresh_preprocessor(test_dir)
 
         with pytest.raises(ValueError, match="Function 'nonExistentFunc' not found"):
             preprocessor.process_file(target_file)
 
-    def test_complex_function_signature(self):
+    def test_signature_formatting_not_a_mismatch(self, preprocessor_pool):
+        """Test that a multi-line copy of a single-line signature does not conflict."""
+        test_dir = self.test_files_dir / "signature_formatting"
+        main_file = test_dir / "main.presl"
+
+        preprocessor = preprocessor_pool(test_dir)
+        result = preprocessor.process_file(main_file)
+
+        counts = _count_function_defs(result)
+        assert counts["f5"] == 1
+        assert counts["double_f5"] == 1
+
+    def test_signature_parameter_change_is_a_mismatch(self, fresh_preprocessor):
+        """Test that signatures differing in their parameters still conflict."""
+        test_dir = self.test_files_dir / "signature_conflict"
+        main_file = test_dir / "main.presl"
+
+        preprocessor = fresh_preprocessor(test_dir)
+
+        with pytest.raises(ValueError, match="Function signature mismatch for 'f5'"):
+            preprocessor.process_file(main_file)
+
+    def test_complex_function_signature(self, preprocessor_pool):
         """Test importing functions with complex signatures."""
         test_dir = self.test_files_dir / "complex_function"
         target_file = test_dir / "main_complex.presl"
 
-        preprocessor = YulPreprocessor(root_dir=test_dir)
+        preprocessor = preprocessor_pool(test_dir)
         result = preprocessor.process_file(target_file)
 
         assert "function computeMultiple(a, b, c) -> x, y, z" in result
@@ -113,12 +212,12 @@ class TestYulPreprocessor:
         assert "y := mul(b, c)" in result
         assert "z := sub(c, a)" in result
 
-    def test_multiple_assembly_blocks(self):
+    def test_multiple_assembly_blocks(self, preprocessor_pool):
         """Test file with multiple assembly blocks."""
         test_dir = self.test_files_dir / "multiple_assembly_blocks"
         target_file = test_dir / "main_multi.presl"
 
-        preprocessor = YulPreprocessor(root_dir=test_dir)
+        preprocessor = preprocessor_pool(test_dir)
         result = preprocessor.process_file(target_file)
 
         assert "function func1() -> result" in result
@@ -174,12 +273,31 @@ class TestYulPreprocessor:
         assert "let x := 1" in blocks[0][2]
         assert "let y := 2" in blocks[1][2]
 
-    def test_caching(self):
+    @pytest.mark.parametrize(
+        ("header_lines", "marker", "expected"),
+        [
+            (9, "// does-not-compile", True),
+            (10, "// does-not-compile", False),
+            (0, "//  Does NOT\tcompile ", True),
+            (3, "// DOES - NOT - COMPILE", True),
+            (0, "// does compile", False),
+        ],
+    )
+    def test_should_skip_file(self, tmp_path, header_lines, marker, expected):
+        """Test the does-not-compile marker: only the first 10 lines count, spacing and case are loose."""
+        source_file = tmp_path / "marked.presl"
+        # Long lines push the later lines past the first read of the header
+        lines = ["// " + "x" * 1000] * header_lines + [marker, "contract C {}"]
+        source_file.write_text("\n".join(lines), encoding="utf-8")
+
+        assert YulPreprocessor().should_skip_file(source_file) is expected
+
+    def test_caching(self, preprocessor_pool):
         """Test that processed files are cached."""
         test_dir = self.test_files_dir / "caching"
         source_file = test_dir / "cached.presl"
 
-        preprocessor = YulPreprocessor(root_dir=test_dir)
+        preprocessor = preprocessor_pool(test_dir)
 
         # Process twice
         result1 = preprocessor.process_file(source_file)
@@ -189,13 +307,117 @@ class TestYulPreprocessor:
         assert source_file in preprocessor.processed_cache
         assert result1 == result2
 
-    def test_preprocess_file_output(self):
+    def test_directory_cache(self, tmp_path):
+        """Test that a warm run reuses cached outputs until an input changes."""
+        src_dir = tmp_path / "src"
+        shutil.copytree(self.test_files_dir / "basic_import", src_dir)
+        cache_dir = tmp_path / "cache"
+        output_file = src_dir / "main.post.sol"
+
+        assert (
+            YulPreprocessor(root_dir=src_dir).preprocess_directory(
+                str(src_dir), format_output=False, cache_dir=str(cache_dir)
+            )
+            == 0
+        )
+        cold_output = output_file.read_text(encoding="utf-8")
+        assert (cache_dir / "index.json").exists()
+
+        # A warm run must not process anything
+        warm = YulPreprocessor(root_dir=src_dir)
+        output_file.unlink()
+        assert (
+            warm.preprocess_directory(
+                str(src_dir), format_output=False, cache_dir=str(cache_dir)
+            )
+            == 0
+        )
+        assert not warm.source_files
+        assert output_file.read_text(encoding="utf-8") == cold_output
+
+        # Changing an imported file invalidates the cache
+        utils_file = src_dir / "utils.presl"
+        utils_file.write_text(
+            utils_file.read_text(encoding="utf-8").replace("add(x, 5)", "add(x, 6)"),
+            encoding="utf-8",
+        )
+        stale = YulPreprocessor(root_dir=src_dir)
+        assert (
+            stale.preprocess_directory(
+                str(src_dir), format_output=False, cache_dir=str(cache_dir)
+            )
+            == 0
+        )
+        assert stale.source_files
+        assert "add(x, 6)" in output_file.read_text(encoding="utf-8")
+
+    def test_directory_cache_keyed_on_tool(self, tmp_path, monkeypatch):
+        """Test that a change to the preprocessor itself invalidates the cache."""
+        src_dir = tmp_path / "src"
+        shutil.copytree(self.test_files_dir / "basic_import", src_dir)
+        cache_dir = tmp_path / "cache"
+
+        YulPreprocessor(root_dir=src_dir).preprocess_directory(
+            str(src_dir), format_output=False, cache_dir=str(cache_dir)
+        )
+
+        monkeypatch.setattr(yul_preprocessor, "_TOOL_DIGEST", "0" * 32)
+        changed = YulPreprocessor(root_dir=src_dir)
+        assert (
+            changed.preprocess_directory(
+                str(src_dir), format_output=False, cache_dir=str(cache_dir)
+            )
+            == 0
+        )
+        assert changed.source_files
+
+    def test_cli_arguments(self, tmp_path):
+        """Test that --cache-dir is accepted anywhere and unknown arguments are rejected."""
+        src_dir = tmp_path / "src"
+        shutil.copytree(self.test_files_dir / "basic_import", src_dir)
+        cache_dir = tmp_path / "cache"
+
+        with pytest.raises(SystemExit) as exit_info:
+            main(["--cache-dir", str(cache_dir), str(src_dir)])
+        assert exit_info.value.code == 0
+        assert (cache_dir / "index.json").exists()
+
+        for argv in (
+            [str(src_dir), "--cache", str(cache_dir)],
+            [str(src_dir), str(cache_dir)],
+        ):
+            with pytest.raises(SystemExit) as exit_info:
+                main(argv)
+            assert exit_info.value.code == 2
+
+    def test_find_presl_files(self, tmp_path):
+        """Test the directory walk: nested directories found, symlinked directories not followed."""
+        for relative in ("b.presl", "a/x.t.presl", "a/deep/y.presl", ".hidden/z.presl"):
+            (tmp_path / relative).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / relative).write_text("", encoding="utf-8")
+        (tmp_path / "a" / "skip.sol").write_text("", encoding="utf-8")
+        outside = tmp_path.parent / f"{tmp_path.name}_outside"
+        outside.mkdir()
+        (outside / "linked.presl").write_text("", encoding="utf-8")
+        (tmp_path / "link").symlink_to(outside, target_is_directory=True)
+
+        found = sorted(_find_presl_files(tmp_path))
+
+        assert found == [
+            tmp_path / ".hidden" / "z.presl",
+            tmp_path / "a" / "deep" / "y.presl",
+            tmp_path / "a" / "x.t.presl",
+            tmp_path / "b.presl",
+        ]
+        assert found == sorted(tmp_path.rglob("*.presl"))
+
+    def test_preprocess_file_output(self, preprocessor_pool, tmp_path):
         """Test preprocessing with file output."""
         test_dir = self.test_files_dir / "preprocess_output"
         input_file = test_dir / "input.presl"
-        output_file = test_dir / "output" / "output.post.sol"
+        output_file = tmp_path / "output" / "output.post.sol"
 
-        preprocessor = YulPreprocessor(root_dir=test_dir)
+        preprocessor = preprocessor_pool(test_dir)
         preprocessor.preprocess_file(
             str(input_file), str(output_file), format_output=False
         )
@@ -204,35 +426,34 @@ class TestYulPreprocessor:
         content = output_file.read_text()
         assert "function testFunc() -> result" in content
 
-        # Clean up output file
-        output_file.unlink()
-
-    def test_multiple_imports_per_line(self):
+    def test_multiple_imports_per_line(self, preprocessor_pool):
         """Test importing multiple functions in a single import statement."""
         test_dir = self.test_files_dir / "multiple_imports_per_line"
         target_file = test_dir / "main.presl"
 
-        preprocessor = YulPreprocessor(root_dir=test_dir)
+        preprocessor = preprocessor_pool(test_dir)
         result = preprocessor.process_file(target_file)
 
         # Verify requested functions were imported
         assert "function _add(a, b) -> result" in result
         assert "function multiply(a, b) -> result" in result
-        assert result.count("function _add(a, b) -> result") == 1
-        assert result.count("function multiply(a, b) -> result") == 1
+        counts = _count_function_defs(result)
+        assert counts["_add"] == 1
+        assert counts["multiply"] == 1
         # Note: subtract may also be included as it's from the same file
         # This is correct behavior - importing from a file gets its complete definition
 
-    def test_self_import(self):
+    def test_self_import(self, preprocessor_pool):
         """Test importing functions from a different assembly block in the same file."""
         test_dir = self.test_files_dir / "self_import"
         target_file = test_dir / "single_self_import.presl"
 
-        preprocessor = YulPreprocessor(root_dir=test_dir)
+        preprocessor = preprocessor_pool(test_dir)
         result = preprocessor.process_file(target_file)
 
         # The function should appear twice: once in the original block, once imported
-        assert result.count("function utilFunc(x) -> result") == 2
+        assert "function utilFunc(x) -> result" in result
+        assert _count_function_defs(result)["utilFunc"] == 2
         assert "result := add(x, 42)" in result
         # Verify it's usable in the second block
         assert "let value := utilFunc(10)" in result
@@ -242,17 +463,20 @@ class TestYulPreprocessor:
         assert "function exclude_coverage_start_utilFunc() {}" in result
         assert "function exclude_coverage_stop_utilFunc() {}" in result
 
-    def test_self_import_multiple(self):
+    def test_self_import_multiple(self, preprocessor_pool):
         """Test importing multiple functions from a different assembly block in the same file."""
         test_dir = self.test_files_dir / "self_import"
         target_file = test_dir / "self_referencing.presl"
 
-        preprocessor = YulPreprocessor(root_dir=test_dir)
+        preprocessor = preprocessor_pool(test_dir)
         result = preprocessor.process_file(target_file)
 
         # Each function should appear twice: once in the original block, once imported
-        assert result.count("function helper(x) -> result") == 2
-        assert result.count("function anotherHelper(y) -> result") == 2
+        assert "function helper(x) -> result" in result
+        assert "function anotherHelper(y) -> result" in result
+        counts = _count_function_defs(result)
+        assert counts["helper"] == 2
+        assert counts["anotherHelper"] == 2
         assert "result := mul(x, 2)" in result
         assert "result := add(y, 10)" in result
         # Verify they're usable in the second block
@@ -266,20 +490,18 @@ class TestYulPreprocessor:
         assert "function exclude_coverage_start_anotherHelper() {}" in result
         assert "function exclude_coverage_stop_anotherHelper() {}" in result
 
-    def test_circular_with_external_import(self):
+    def test_circular_with_external_import(self, fresh_preprocessor):
         """Test that C can import from a circular group A-B."""
         test_dir = self.test_files_dir / "circular_regular"
         file_c = test_dir / "c.presl"
 
-        preprocessor = YulPreprocessor(root_dir=test_dir)
+        preprocessor = fresh_preprocessor(test_dir)
         result_c = preprocessor.process_file(file_c)
 
         # C should have funcA, funcB, and funcC
-        assert "function funcA() -> result" in result_c
-        assert "function funcB() -> result" in result_c
-        assert "function funcC() -> result" in result_c
+        assert {"funcA", "funcB", "funcC"} <= _defined_funcs(result_c)
 
-    def test_nested_circular_dependencies(self):
+    def test_nested_circular_dependencies(self, fresh_preprocessor):
         """Test nested circular dependencies: C -> B0..B1 -> A0..A1 -> utils.
 
         With the new dependency tracking, only functions that are actually used (called)
@@ -288,7 +510,7 @@ class TestYulPreprocessor:
         test_dir = self.test_files_dir / "nested_circular"
 
         # Process all files
-        preprocessor = YulPreprocessor(root_dir=test_dir)
+        preprocessor = fresh_preprocessor(test_dir)
 
         result_c = preprocessor.process_file(test_dir / "c.presl")
         result_b0 = preprocessor.process_file(test_dir / "b0.presl")
@@ -296,42 +518,44 @@ class TestYulPreprocessor:
         result_a0 = preprocessor.process_file(test_dir / "a0.presl")
         result_a1 = preprocessor.process_file(test_dir / "a1.presl")
 
+        defined_a0 = _defined_funcs(result_a0)
+        defined_a1 = _defined_funcs(result_a1)
+        defined_b0 = _defined_funcs(result_b0)
+        defined_b1 = _defined_funcs(result_b1)
+        defined_c = _defined_funcs(result_c)
+
         # A0 and A1 form a cycle, so they should both have funcA0 and funcA1
-        assert "function funcA0() -> result" in result_a0
-        assert "function funcA1() -> result" in result_a0
-        assert "function funcA0() -> result" in result_a1
-        assert "function funcA1() -> result" in result_a1
+        assert {"funcA0", "funcA1"} <= defined_a0
+        assert {"funcA0", "funcA1"} <= defined_a1
 
         # A0 and A1 should also have utils functions they imported
-        assert "function utilAdd" in result_a0
-        assert "function utilMul" in result_a1
+        assert "utilAdd" in defined_a0
+        assert "utilMul" in defined_a1
 
         # B0 and B1 form a cycle, so they should both have funcB0 and funcB1
-        assert "function funcB0() -> result" in result_b0
-        assert "function funcB1() -> result" in result_b0
-        assert "function funcB0() -> result" in result_b1
-        assert "function funcB1() -> result" in result_b1
+        assert {"funcB0", "funcB1"} <= defined_b0
+        assert {"funcB0", "funcB1"} <= defined_b1
 
         # B0 and B1 should also have A0 and A1 functions (transitively imported)
-        assert "function funcA0() -> result" in result_b0
-        assert "function funcA1() -> result" in result_b1
+        assert "funcA0" in defined_b0
+        assert "funcA1" in defined_b1
 
         # C should have functions from B cycle
         # When importing from a cycle, all functions from that cycle (and their
-        # external dependencies) are included, not just the directly called ones
-        assert "function funcC() -> result" in result_c
-        assert "function funcB0() -> result" in result_c
-        assert "function funcB1() -> result" in result_c
-        # funcA0 and funcA1 should be in C because they're external dependencies
-        # of the {b0, b1} cycle
-        assert "function funcA0() -> result" in result_c
-        assert "function funcA1() -> result" in result_c
-        # util functions should also be in C as they're external dependencies
-        # of the {a0, a1} cycle
-        assert "function utilAdd" in result_c
-        assert "function utilMul" in result_c
-
-    def test_unused_functions_excluded(self):
+        # external dependencies) are included, not just the directly called ones.
+        # funcA0 and funcA1 are external dependencies of the {b0, b1} cycle, and
+        # the util functions are external dependencies of the {a0, a1} cycle.
+        assert {
+            "funcC",
+            "funcB0",
+            "funcB1",
+            "funcA0",
+            "funcA1",
+            "utilAdd",
+            "utilMul",
+        } <= defined_c
+
+    def test_unused_functions_excluded(self, preprocessor_pool):
         """Test that unrelated functions are NOT imported when not dependencies.
 
         When importing 'baz' from a library that also has 'foo' and 'bar'
@@ -341,7 +565,7 @@ class TestYulPreprocessor:
         test_dir = self.test_files_dir / "unused_functions"
         main_file = test_dir / "main.presl"
 
-        preprocessor = YulPreprocessor(root_dir=test_dir)
+        preprocessor = preprocessor_pool(test_dir)
         result = preprocessor.process_file(main_file)
 
         # baz should be imported (explicitly requested)
@@ -358,13 +582,13 @@ class TestYulPreprocessor:
         # unrelated should also NOT be imported
         assert "function unrelated() -> result" not in result
 
-    def test_t_presl_file_processing(self):
+    def test_t_presl_file_processing(self, preprocessor_pool, tmp_path):
         """Test that .t.presl files replace .presl with .post.sol in imports."""
         test_dir = self.test_files_dir / "t_presol_test"
         input_file = test_dir / "Example.t.presl"
-        output_file = test_dir / "Example.t.post.sol"
+        output_file = tmp_path / "Example.t.post.sol"
 
-        preprocessor = YulPreprocessor(root_dir=test_dir)
+        preprocessor = preprocessor_pool(test_dir)
 
         # Process the .t.presl file using regular process_file
         result = preprocessor.process_file(input_file)
@@ -375,15 +599,12 @@ class TestYulPreprocessor:
         assert 'from "./Helper.post.sol"' in result
         assert ".presl" not in result
 
-        # Clean up
-        output_file.unlink()
-
-    def test_multiline_function_definition(self):
+    def test_multiline_function_definition(self, preprocessor_pool):
         """Test importing functions with multiline signatures."""
         test_dir = self.test_files_dir / "multiline_function"
         target_file = test_dir / "main.presl"
 
-        preprocessor = YulPreprocessor(root_dir=test_dir)
+        preprocessor = preprocessor_pool(test_dir)
         result = preprocessor.process_file(target_file)
 
         # Verify the multiline function was imported correctly
@@ -394,6 +615,22 @@ class TestYulPreprocessor:
         assert "x := add(a, b)" in result
         assert "y := mul(b, c)" in result
 
+    def test_multiline_local_copy_of_imported_function(self, preprocessor_pool):
+        """Test that a local copy with a multi-line signature is fully replaced by the import."""
+        test_dir = self.test_files_dir / "multiline_local_copy"
+        main_file = test_dir / "main.presl"
+
+        preprocessor = preprocessor_pool(test_dir)
+        result = preprocessor.process_file(main_file)
+
+        # Exactly one definition, and nothing left over from the local copy
+        assert _count_function_defs(result)["helper"] == 1
+        assert result.count("r := add(a, b)") == 1
+        stripped_lines = {line.strip() for line in result.split("\n")}
+        assert ") -> r {" not in stripped_lines
+        assert "a," not in stripped_lines
+        assert "result := helper(1, 2)" in result
+
     def test_extract_multiline_functions(self):
         """Test extraction of functions with multiline signatures."""
         preprocessor = YulPreprocessor()
@@ -424,20 +661,16 @@ class TestYulPreprocessor:
         assert "grault" in multiline_func.signature
         assert "result_a, result_b" in multiline_func.signature
 
-    def test_solidity_imports_converted_in_presl_output(self):
+    def test_solidity_imports_converted_in_presl_output(self, preprocessor_pool):
         """Test that Solidity imports with .presl extension are converted to .post.sol in .post.sol output."""
         test_dir = self.test_files_dir / "sol_import_conversion"
         test_file = test_dir / "TestContract.presl"
 
-        preprocessor = YulPreprocessor(root_dir=test_dir)
+        preprocessor = preprocessor_pool(test_dir)
         result = preprocessor.process_file(test_file)
 
         # Verify no .presl imports remain in Solidity import statements
-        import re
-
-        presl_imports = re.findall(
-            r'import\s+(?:.*?\s+from\s+)?["\'][^"\']*?\.presl["\']', result
-        )
+        presl_imports = _PRESL_IMPORT_RE.findall(result)
 
         assert (
             len(presl_imports) == 0
@@ -446,40 +679,33 @@ class TestYulPreprocessor:
         assert 'import "./SomeLib.post.sol"' in result
         assert 'import {Util} from "./Utils.post.sol"' in result
 
-    def test_solidity_imports_converted_in_t_presl_output(self):
+    def test_solidity_imports_converted_in_t_presl_output(
+        self, preprocessor_pool, tmp_path
+    ):
         """Test that .t.presl files have both styles of Solidity imports with .presl converted to .post.sol."""
         test_dir = self.test_files_dir / "t_presl_sol_imports"
         test_file = test_dir / "ExampleTest.t.presl"
-        output_file = test_dir / "ExampleTest.t.post.sol"
+        output_file = tmp_path / "ExampleTest.t.post.sol"
 
-        preprocessor = YulPreprocessor(root_dir=test_dir)
+        preprocessor = preprocessor_pool(test_dir)
 
-        try:
-            # Process using regular process_file
-            result = preprocessor.process_file(test_file)
-            output_file.write_text(result)
+        # Process using regular process_file
+        result = preprocessor.process_file(test_file)
+        output_file.write_text(result)
 
-            # Verify no .presl remains in output
-            import re
+        # Verify no .presl remains in output
+        presl_imports = _PRESL_IMPORT_RE.findall(result)
+        assert (
+            len(presl_imports) == 0
+        ), f"Found .presl imports in .t.post.sol output: {presl_imports}"
 
-            presl_imports = re.findall(
-                r'import\s+(?:.*?\s+from\s+)?["\'][^"\']*?\.presl["\']', result
-            )
-            assert (
-                len(presl_imports) == 0
-            ), f"Found .presl imports in .t.post.sol output: {presl_imports}"
-
-            # Verify both import styles were converted to .post.sol
-            assert ".post.sol" in result, "Output should have .post.sol imports"
-            assert 'import "./SomeLib.post.sol"' in result
-            assert 'from "./Utils.post.sol"' in result
-            assert 'from "./Helper.post.sol"' in result
-        finally:
-            # Clean up
-            if output_file.exists():
-                output_file.unlink()
-
-    def test_self_import_with_external_deps(self):
+        # Verify both import styles were converted to .post.sol
+        assert ".post.sol" in result, "Output should have .post.sol imports"
+        assert 'import "./SomeLib.post.sol"' in result
+        assert 'from "./Utils.post.sol"' in result
+        assert 'from "./Helper.post.sol"' in result
+
+    def test_self_import_with_external_deps(self, preprocessor_pool):
         """Test that self imports correctly include external dependencies of the imported function.
 
         This is a regression test for a bug where importing a function 'from self' would
@@ -489,117 +715,96 @@ class TestYulPreprocessor:
         test_dir = self.test_files_dir / "self_import_with_external_deps"
         target_file = test_dir / "main.presl"
 
-        preprocessor = YulPreprocessor(root_dir=test_dir)
+        preprocessor = preprocessor_pool(test_dir)
         result = preprocessor.process_file(target_file)
 
         # In the first() function's assembly block, compute() calls add_one() and double_value()
         # which are imported from helper.presl
         first_block_start = result.find("function first()")
-        second_block_start = result.find("function second()")
+        second_block_start = result.find("function second()", first_block_start + 1)
         first_block = result[first_block_start:second_block_start]
 
         # First block should have all three functions
-        assert "function compute(x) -> result" in first_block
-        assert "function add_one(x) -> result" in first_block
-        assert "function double_value(x) -> result" in first_block
+        assert {"compute", "add_one", "double_value"} <= _defined_funcs(first_block)
 
         # In the second() function's assembly block, we import compute from self
         # This should transitively import add_one and double_value as well
         second_block = result[second_block_start:]
 
         # Second block should also have all three functions (the bug was that it only had compute)
+        defined_second = _defined_funcs(second_block)
+        assert "compute" in defined_second, "compute() should be imported from self"
         assert (
-            "function compute(x) -> result" in second_block
-        ), "compute() should be imported from self"
-        assert (
-            "function add_one(x) -> result" in second_block
+            "add_one" in defined_second
         ), "add_one() should be transitively imported as a dependency of compute()"
         assert (
-            "function double_value(x) -> result" in second_block
+            "double_value" in defined_second
         ), "double_value() should be transitively imported as a dependency of compute()"
 
         # Verify compute actually calls these functions
-        compute_in_second = second_block[
-            second_block.find("function compute") : second_block.find(
-                "function compute"
-            )
-            + 200
-        ]
+        compute_idx = result.find("function compute", second_block_start)
+        compute_in_second = result[compute_idx : compute_idx + 200]
         assert "add_one" in compute_in_second
         assert "double_value" in compute_in_second
 
-    def test_no_presl_references_in_post_sol_imports(self):
+    @pytest.mark.parametrize(
+        ("case_dir", "input_name", "output_name"),
+        [
+            (
+                "strict_no_presl_imports/case1",
+                "MultipleImports.presl",
+                "MultipleImports.post.sol",
+            ),
+            (
+                "strict_no_presl_imports/case2",
+                "TestWithComments.t.presl",
+                "TestWithComments.t.post.sol",
+            ),
+        ],
+    )
+    def test_no_presl_references_in_post_sol_imports(
+        self, preprocessor_pool, tmp_path, case_dir, input_name, output_name
+    ):
         """
         Strict test: ensure NO .presl references appear in import statements of any .post.sol output.
-        This test processes multiple files and validates all outputs.
+        Each case processes one file and validates its output.
         """
-        import re
-
-        test_cases = [
-            {
-                "dir": "strict_no_presl_imports/case1",
-                "input": "MultipleImports.presl",
-                "use_t_presl": False,
-            },
-            {
-                "dir": "strict_no_presl_imports/case2",
-                "input": "TestWithComments.t.presl",
-                "use_t_presl": True,
-            },
-        ]
+        test_dir = self.test_files_dir / case_dir
+        input_file = test_dir / input_name
+
+        preprocessor = preprocessor_pool(test_dir)
+
+        # Use regular process_file for both .presl and .t.presl files
+        result = preprocessor.process_file(input_file)
+
+        output_file = tmp_path / output_name
+        output_file.write_text(result)
 
-        for test_case in test_cases:
-            test_dir = self.test_files_dir / test_case["dir"]
-            input_file = test_dir / test_case["input"]
-
-            try:
-                preprocessor = YulPreprocessor(root_dir=test_dir)
-
-                # Use regular process_file for both .presl and .t.presl files
-                result = preprocessor.process_file(input_file)
-
-                if test_case["use_t_presl"]:
-                    output_file = test_dir / test_case["input"].replace(
-                        ".t.presl", ".t.post.sol"
-                    )
-                else:
-                    output_file = input_file.with_suffix(".post.sol")
-
-                output_file.write_text(result)
-
-                # Read the output
-                output_content = output_file.read_text()
-
-                # STRICT CHECK: Find any .presl references in import statements
-                presl_in_imports = re.findall(
-                    r'import\s+(?:.*?\s+from\s+)?["\'][^"\']*?\.presl["\']',
-                    output_content,
-                )
-
-                assert len(presl_in_imports) == 0, (
-                    f"FAILED: Found .presl in import statements in {output_file.name}:\n"
-                    f"  Test case: {test_case['dir']}\n"
-                    f"  Matches: {presl_in_imports}\n"
-                    f"  All .presl references MUST be converted to .post.sol in imports"
-                )
-
-                # Verify .post.sol replacements exist
-                assert ".post.sol" in output_content, (
-                    f"FAILED: No .post.sol references found in {output_file.name}. "
-                    f"Expected .presl imports to be converted."
-                )
-
-            finally:
-                # Clean up output files
-                if output_file.exists():
-                    output_file.unlink()
-
-    def test_slither_comments_preserved(self):
+        # Read the output
+        output_content = output_file.read_text()
+
+        # STRICT CHECK: Find any .presl references in import statements
+        presl_in_imports = _PRESL_IMPORT_RE.findall(output_content)
+
+        assert len(presl_in_imports) == 0, (
+            f"FAILED: Found .presl in import statements in {output_file.name}:\n"
+            f"  Test case: {case_dir}\n"
+            f"  Matches: {presl_in_imports}\n"
+            f"  All .presl references MUST be converted to .post.sol in imports"
+        )
+
+        # Verify .post.sol replacements exist
+        assert ".post.sol" in output_content, (
+            f"FAILED: No .post.sol references found in {output_file.name}. "
+            f"Expected .presl imports to be converted."
+        )
+
+    def test_slither_comments_preserved(self, preprocessor_pool):
         """Test that Slither exemption comments are preserved with imported functions."""
         test_dir = self.test_files_dir / "slither_comments"
         main_file = test_dir / "main.presl"
 
-        preprocessor = YulPreprocessor(root_dir=test_dir)
+        preprocessor = preprocessor_pool(test_dir)
         result = preprocessor.process_file(main_file)
 
         # Verify both functions were imported
@@ -626,11 +831,14 @@ class TestYulPreprocessor:
         # 3. Function
         # 4. Slither disable-end comment
         # 5. Coverage stop marker
-        start_idx = result.find("// slither-disable-start cyclomatic-complexity")
-        cov_start_idx = result.find("function exclude_coverage_start_complexFunction")
-        func_idx = result.find("function complexFunction")
-        cov_stop_idx = result.find("function exclude_coverage_stop_complexFunction")
-        end_idx = result.find("// slither-disable-end cyclomatic-complexity")
+        positions = {}
+        for match in _SLITHER_MARKERS_RE.finditer(result):
+            positions.setdefault(match.group(), match.start())
+        start_idx = positions["// slither-disable-start cyclomatic-complexity"]
+        cov_start_idx = positions["function exclude_coverage_start_complexFunction"]
+        func_idx = positions["function complexFunction"]
+        cov_stop_idx = positions["function exclude_coverage_stop_complexFunction"]
+        end_idx = positions["// slither-disable-end cyclomatic-complexity"]
         assert (
             cov_start_idx < start_idx < func_idx < end_idx < cov_stop_idx
         ), "Coverage start, slither disable-start, function, slither disable-end, coverage stop"
@@ -638,12 +846,12 @@ class TestYulPreprocessor:
         # Verify no duplicate disable-end comments
         assert result.count("// slither-disable-end cyclomatic-complexity") == 1
 
-    def test_slither_comments_with_code_between(self):
+    def test_slither_comments_with_code_between(self, preprocessor_pool):
         """Test that slither-disable-end is preserved even when code appears between function and end comment."""
         test_dir = self.test_files_dir / "slither_with_code_between"
         main_file = test_dir / "main.presl"
 
-        preprocessor = YulPreprocessor(root_dir=test_dir)
+        preprocessor = preprocessor_pool(test_dir)
         result = preprocessor.process_file(main_file)
 
         # Verify function was imported
@@ -679,13 +887,9 @@ class TestYulPreprocessor:
             < cov_stop_idx
         )
 
-    def test_coverage_exclusion_for_external_imports(self):
+    def test_coverage_exclusion_for_external_imports(self, basic_import_result):
         """Test that functions imported from external files get coverage exclusion markers."""
-        test_dir = self.test_files_dir / "basic_import"
-        target_file = test_dir / "main.presl"
-
-        preprocessor = YulPreprocessor(root_dir=test_dir)
-        result = preprocessor.process_file(target_file)
+        result = basic_import_result
 
         # Verify the imported function has coverage exclusion markers
         assert "function exclude_coverage_start_add5() {}" in result
@@ -699,15 +903,9 @@ class TestYulPreprocessor:
             start_idx < func_idx < stop_idx
         ), "Coverage markers should wrap the imported function"
 
-    def test_coverage_exclusion_circular_dependencies(self):
+    def test_coverage_exclusion_circular_dependencies(self, circular_ab_results):
         """Test that functions in their own file are NOT coverage-excluded in circular dependencies."""
-        test_dir = self.test_files_dir / "circular_regular"
-        file_a = test_dir / "a.presl"
-        file_b = test_dir / "b.presl"
-
-        preprocessor = YulPreprocessor(root_dir=test_dir)
-        result_a = preprocessor.process_file(file_a)
-        result_b = preprocessor.process_file(file_b)
+        result_a, result_b = circular_ab_results
 
         # In a.post.sol, funcA is defined locally so it should NOT have coverage exclusion
         # but funcB is imported so it SHOULD have coverage exclusion
@@ -730,13 +928,9 @@ class TestYulPreprocessor:
         assert "function exclude_coverage_start_funcB() {}" not in result_b
         assert "function exclude_coverage_stop_funcB() {}" not in result_b
 
-    def test_coverage_exclusion_with_dependencies(self):
+    def test_coverage_exclusion_with_dependencies(self, calculator_result):
         """Test that transitive dependencies also get coverage exclusion markers."""
-        test_dir = self.test_files_dir / "multiple_imports"
-        target_file = test_dir / "calculator.presl"
-
-        preprocessor = YulPreprocessor(root_dir=test_dir)
-        result = preprocessor.process_file(target_file)
+        result = calculator_result
 
         # Both imported functions should have coverage exclusion markers
         assert "function exclude_coverage_start_multiply() {}" in result
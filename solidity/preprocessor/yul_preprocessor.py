@@ -7,7 +7,7 @@ within assembly blocks. Recursively processes dependencies and handles function
 deduplication.
 
 Usage:
-    python3 yul_preprocessor.py <directory>
+    python3 yul_preprocessor.py <directory> [--cache-dir <dir>]
 
 Import Syntax:
     // import <function_name> from <file_path>
@@ -21,12 +21,104 @@ Example:
     // import helperFunc from self
 """
 
+import argparse
+import hashlib
+import json
 import os
 import re
+import shutil
 import sys
 import subprocess
+from itertools import chain, compress
 from pathlib import Path
-from typing import Dict, Set, List, Tuple, Optional
+from types import MappingProxyType
+from typing import Dict, Mapping, Set, List, Tuple, Optional
+
+# Regex patterns
+# Supports multiple imports: import foo, bar, baz from file.sol
+# Whitespace is matched with [^\S\n] so an import never spans lines
+_IMPORT_RE = re.compile(
+    r"//[^\S\n]*import[^\S\n]+((?:[^\S\n]|[\w,])+)[^\S\n]+from[^\S\n]+([^\s]+)"
+)
+_ASSEMBLY_START_RE = re.compile(r"assembly\s*\{")
+# Simple pattern to extract just the function name (for multiline signatures)
+_FUNCTION_NAME_RE = re.compile(r"function\s+(\w+)")
+_BRACE_RE = re.compile(r"[{}]")
+# Function calls: a word boundary followed by an opening parenthesis
+_CALL_RE = re.compile(r"\b(\w+)\s*\(")
+# Whitespace inside parentheses and around commas of a normalized signature
+_SIGNATURE_SPACING_RE = re.compile(r"(?<=\() | (?=\))| ?, ?")
+# Solidity import statements that reference a .presl file, in both formats:
+# import "path.presl"; and import {X} from "path.presl";
+_PRESL_IMPORT_RE = re.compile(
+    r'(import\s+(?:.*?\s+from\s+)?["\'])([^"\']*?)\.presl(["\'])'
+)
+
+
+_CACHE_VERSION = 1
+_CACHE_INDEX = "index.json"
+
+
+def _file_digest(path: Path) -> str:
+    """Content hash used to key the on-disk cache."""
+    return hashlib.blake2b(path.read_bytes(), digest_size=16).hexdigest()
+
+
+# Digest of this script, so a change to the preprocessing logic invalidates the cache
+_TOOL_DIGEST = _file_digest(Path(__file__))
+
+
+def _find_presl_files(directory: Path) -> List[Path]:
+    """
+    Find all .presl files (including .t.presl) under directory, like rglob("*.presl"):
+    hidden entries are included and symlinked directories are not followed.
+    Walks the tree with os.scandir, matching entry names without building a Path per entry.
+    """
+    found = []
+    pending = [os.fspath(directory)]
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".presl"):
+                        found.append(entry.path)
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            pending.append(entry.path)
+                    except OSError:
+                        pass
+        except PermissionError:
+            continue
+    return [Path(path) for path in found]
+
+
+def _split_func_names(func_names_str: str) -> List[str]:
+    """Split the comma-separated function names of an import statement."""
+    if "," not in func_names_str:
+        # Most imports name a single function
+        return [func_names_str.strip()]
+    return [name.strip() for name in func_names_str.split(",")]
+
+
+def _normalize_signature_spacing(match: re.Match) -> str:
+    """Replacement for _SIGNATURE_SPACING_RE matches."""
+    return ", " if "," in match.group() else ""
+
+
+def _iter_block_imports(block_content: str):
+    """
+    Yield the first import statement match on each line of an assembly block,
+    scanning the whole block with a single regex pass.
+    """
+    line_end = -1
+    for import_match in _IMPORT_RE.finditer(block_content):
+        if import_match.start() < line_end:
+            # A later import on a line that already had one
+            continue
+        yield import_match
+        line_end = block_content.find("\n", import_match.end())
+        if line_end == -1:
+            break
 
 
 class YulFunction:
@@ -42,8 +134,16 @@ class YulFunction:
         post_comments: str = "",
         source_file: Optional[Path] = None,
     ):
-        self.name = name
-        self.signature = signature  # function name(...) -> ...
+        self.name = sys.intern(name)
+        # function name(...) -> ..., with whitespace normalized and interned so that
+        # comparisons ignore formatting and repeated signatures share one string:
+        # runs of whitespace become one space, none is kept after "(" or before ")",
+        # and commas are always followed by exactly one space
+        self.signature = sys.intern(
+            _SIGNATURE_SPACING_RE.sub(
+                _normalize_signature_spacing, " ".join(signature.split())
+            )
+        )
         self.body = body
         self.full_text = full_text  # Complete function including definition
         self.pre_comments = (
@@ -66,26 +166,102 @@ class YulFunction:
         return f"YulFunction({self.name}, sig={self.signature})"
 
 
+class _ProcessingStack(list):
+    """The stack of files being processed, with O(1) membership tests."""
+
+    def __init__(self):
+        super().__init__()
+        self._counts: Dict[Path, int] = {}  # How many times each file is on the stack
+
+    def __contains__(self, path) -> bool:
+        return path in self._counts
+
+    def append(self, path: Path):
+        super().append(path)
+        self._counts[path] = self._counts.get(path, 0) + 1
+
+    def remove(self, path: Path):
+        count = self._counts[path]
+        if count == 1 and self[-1] == path:
+            # Common case: the file is the top of the stack
+            self.pop()
+        else:
+            super().remove(path)
+        if count == 1:
+            del self._counts[path]
+        else:
+            self._counts[path] = count - 1
+
+
 class YulPreprocessor:
     """Preprocesses Solidity files with Yul import statements."""
 
     def __init__(self, root_dir: Optional[str] = None):
         self.root_dir = Path(root_dir) if root_dir else Path.cwd()
         self.processed_cache: Dict[Path, str] = {}  # Cache of processed files
-        self.cycle_groups: Dict[frozenset, Dict[str, YulFunction]] = (
+        self.cycle_groups: Dict[int, Dict[str, YulFunction]] = (
             {}
-        )  # Cache for circular dependency groups
-
-        # Regex patterns
-        # Updated to support multiple imports: import foo, bar, baz from file.sol
-        self.import_pattern = re.compile(r"//\s*import\s+([\w\s,]+)\s+from\s+([^\s]+)")
-        self.assembly_start = re.compile(r"assembly\s*\{")
-        # Pattern for complete function signature (used for matching full signatures)
-        self.function_pattern = re.compile(
-            r"function\s+(\w+)\s*\([^)]*\)(?:\s*->\s*[^{]*)?", re.DOTALL
-        )
-        # Simple pattern to extract just the function name (for multiline signatures)
-        self.function_name_pattern = re.compile(r"function\s+(\w+)")
+        )  # Cache for circular dependency groups, keyed by cycle id
+        self.cycle_ids: Dict[frozenset, int] = {}  # Files in a cycle -> cycle id
+        # First cycle group each file was found in
+        self.file_cycle_ids: Dict[Path, int] = {}
+        # Cache of parsed source files:
+        # path -> (mtime_ns, (content, blocks, functions per block), function line ranges per block)
+        self.file_parse_cache: Dict[
+            Path,
+            Tuple[
+                int,
+                Tuple[str, List[Tuple[int, int, str]], List[Dict[str, YulFunction]]],
+                List[List[Tuple[str, int, int]]],
+            ],
+        ] = {}
+        # Cache of resolved relative imports: (importing directory, import path) -> path
+        self.import_path_cache: Dict[Tuple[Path, str], Path] = {}
+        # Cache of the names called from each function body
+        self.call_names_cache: Dict[str, Tuple[str, ...]] = {}
+        # Cache of the functions in each imported file's processed output, and of the
+        # dependency closures computed from them:
+        # path -> (processed content, functions, function name -> closure)
+        self.processed_functions_cache: Dict[
+            Path,
+            Tuple[str, Dict[str, YulFunction], Dict[str, Dict[str, YulFunction]]],
+        ] = {}
+        # Dependency closures computed in each cycle group: cycle id -> function name -> closure
+        self.cycle_dependency_cache: Dict[int, Dict[str, Dict[str, YulFunction]]] = {}
+        # Path of the forge binary, looked up on first use (None if not looked up yet)
+        self.forge_path: Optional[str] = None
+        # Every source file read while processing, for the on-disk cache
+        self.source_files: Set[Path] = set()
+
+    def _load(
+        self, file_path: Path
+    ) -> Tuple[str, List[Tuple[int, int, str]], List[Dict[str, YulFunction]]]:
+        """
+        Read and parse a source file, reusing the cached parse while its mtime is unchanged.
+        Returns (content, assembly_blocks, functions_per_block).
+        """
+        file_path = file_path.resolve()
+        mtime_ns = file_path.stat().st_mtime_ns
+        self.source_files.add(file_path)
+
+        cached = self.file_parse_cache.get(file_path)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+
+        content = file_path.read_text(encoding="utf-8")
+        assembly_blocks = self.find_assembly_blocks(content)
+        functions_per_block = []
+        ranges_per_block = []
+        for _, _, block_content in assembly_blocks:
+            functions, ranges = self.extract_yul_functions_with_ranges(
+                block_content, file_path
+            )
+            functions_per_block.append(functions)
+            ranges_per_block.append(ranges)
+
+        parsed = (content, assembly_blocks, functions_per_block)
+        self.file_parse_cache[file_path] = (mtime_ns, parsed, ranges_per_block)
+        return parsed
 
     def find_assembly_blocks(self, content: str) -> List[Tuple[int, int, str]]:
         """
@@ -93,33 +269,37 @@ class YulPreprocessor:
         Returns list of (start_pos, end_pos, block_content) tuples.
         """
         blocks = []
+        if "assembly" not in content:
+            # Cheap substring check before any regex work
+            return blocks
+
         pos = 0
 
         while True:
-            match = self.assembly_start.search(content, pos)
+            match = _ASSEMBLY_START_RE.search(content, pos)
             if not match:
                 break
 
-            # Find the opening brace
+            # Find the matching close brace, jumping from brace to brace
             start = match.end()
             brace_count = 1
-            i = start
 
-            while i < len(content) and brace_count > 0:
-                if content[i] == "{":
+            for brace in _BRACE_RE.finditer(content, start):
+                if brace.group() == "{":
                     brace_count += 1
-                elif content[i] == "}":
+                else:
                     brace_count -= 1
-                i += 1
-
-            if brace_count == 0:
-                # Found matching close brace
-                block_content = content[start : i - 1]
-                blocks.append((match.start(), i, block_content))
-                pos = i
+                    if brace_count == 0:
+                        break
             else:
                 break
 
+            # Found matching close brace
+            end = brace.end()
+            block_content = content[start : end - 1]
+            blocks.append((match.start(), end, block_content))
+            pos = end
+
         return blocks
 
     def extract_yul_functions(
@@ -131,133 +311,162 @@ class YulPreprocessor:
         Handles multiline function signatures.
         Captures Slither exemption comments before and after functions.
         """
+        functions, _ = self.extract_yul_functions_with_ranges(
+            assembly_content, source_file
+        )
+        return functions
+
+    def extract_yul_functions_with_ranges(
+        self, assembly_content: str, source_file: Optional[Path] = None
+    ) -> Tuple[Dict[str, YulFunction], List[Tuple[str, int, int]]]:
+        """
+        Extract all Yul function definitions from an assembly block, like extract_yul_functions.
+        Also returns a (name, first_line, last_line) tuple for every definition, giving the line
+        range from the start of the signature to the end of the body within the block.
+        """
         functions = {}
+        ranges = []
+        content = assembly_content
+        lines = content.split("\n")
+        num_lines = len(lines)
+        # Without any Slither comments in the block the look-back and look-ahead find nothing
+        has_slither_comments = "slither-disable" in content
+
+        # Walk the block once, jumping between occurrences of the "function" keyword and
+        # keeping a running line number so line indices never have to be recounted
+        line_no = 0  # Line number of line_offset
+        line_offset = 0
+        next_line = 0  # First line not yet consumed by an extracted function
+        pos = content.find("function")
+
+        while pos != -1:
+            # Only lines that start with the "function" keyword begin a definition
+            sig_offset = content.rfind("\n", 0, pos) + 1
+            if sig_offset != pos and not content[sig_offset:pos].isspace():
+                pos = content.find("function", pos + 8)
+                continue
 
-        # Find all function definitions
-        lines = assembly_content.split("\n")
-        i = 0
-
-        while i < len(lines):
-            line = lines[i]
-
-            # Check if line starts with "function" keyword
-            if line.strip().startswith("function"):
-                # Look back for Slither disable comments before the function
-                # Only capture slither-disable-start or slither-disable-next-line
-                # Do NOT capture slither-disable-end as that belongs to the previous function
-                pre_comment_lines = []
-                j = i - 1
-                while j >= 0:
-                    prev_line = lines[j].strip()
-                    # Check for slither-disable-start or slither-disable-next-line (not disable-end)
-                    if "slither-disable" in prev_line and prev_line.startswith("//"):
-                        if "slither-disable-end" not in prev_line:
-                            # This is a disable-start or disable-next-line, include it
-                            pre_comment_lines.insert(0, lines[j])
-                            j -= 1
-                        else:
-                            # This is a disable-end from a previous function, stop here
-                            break
-                    elif prev_line == "":
-                        # Allow empty lines but don't add them
+            line_no += content.count("\n", line_offset, sig_offset)
+            line_offset = sig_offset
+            sig_start = line_no
+            if sig_start < next_line:
+                pos = content.find("function", pos + 8)
+                continue
+
+            # Look back for Slither disable comments before the function
+            # Only capture slither-disable-start or slither-disable-next-line
+            # Do NOT capture slither-disable-end as that belongs to the previous function
+            pre_comment_lines = []
+            j = sig_start - 1
+            while has_slither_comments and j >= 0:
+                prev_line = lines[j].strip()
+                # Check for slither-disable-start or slither-disable-next-line (not disable-end)
+                if "slither-disable" in prev_line and prev_line.startswith("//"):
+                    if "slither-disable-end" not in prev_line:
+                        # This is a disable-start or disable-next-line, include it
+                        pre_comment_lines.append(lines[j])
                         j -= 1
                     else:
-                        # Stop when we hit non-comment/non-empty content
+                        # This is a disable-end from a previous function, stop here
                         break
+                elif prev_line == "":
+                    # Allow empty lines but don't add them
+                    j -= 1
+                else:
+                    # Stop when we hit non-comment/non-empty content
+                    break
+            pre_comment_lines.reverse()
 
-                # Extract function name using simple pattern
-                func_match = self.function_name_pattern.search(line)
+            # Extract function name using simple pattern
+            func_match = _FUNCTION_NAME_RE.search(lines[sig_start])
+            if not func_match:
+                # If we can't find function name on the first line, skip
+                pos = content.find("function", pos + 8)
+                continue
+            func_name = func_match.group(1)
 
-                if func_match:
-                    func_name = func_match.group(1)
-                else:
-                    # If we can't find function name on the first line, skip
-                    i += 1
-                    continue
+            # Find opening brace of function body (may span multiple lines)
+            brace_pos = content.find("{", pos)
+            if brace_pos == -1:
+                break
+            sig_end = sig_start + content.count("\n", sig_offset, brace_pos)
+            # Offset of the newline ending the line with the opening brace
+            end_offset = content.find("\n", brace_pos)
+            if end_offset == -1:
+                end_offset = len(content)
+            body_offset = end_offset + 1
+
+            # Extract signature part (everything before the opening brace),
+            # joining signature lines with spaces
+            signature = content[sig_offset:brace_pos].replace("\n", " ").strip()
+
+            # Now find the end of the function body, counting braces line by line
+            end = sig_end
+            line = lines[end]
+            brace_count = line.count("{") - line.count("}")
+            last_line = num_lines - 1
+            while brace_count > 0 and end < last_line:
+                end += 1
+                line = lines[end]
+                brace_count += line.count("{") - line.count("}")
+            if end > sig_end:
+                # Offset of the newline ending the last line of the body
+                end_offset += sum(map(len, lines[sig_end + 1 : end + 1])) + (
+                    end - sig_end
+                )
 
-                # Extract the signature (everything up to the opening brace)
-                sig_start = i
-                sig_lines = [line]
+            # Look ahead for Slither disable-end comments after the function
+            post_comment_lines = []
+            next_line = end + 1
+            temp_i = next_line
 
-                # Find opening brace of function body (may span multiple lines)
-                while i < len(lines) and "{" not in lines[i]:
-                    i += 1
-                    if i < len(lines):
-                        sig_lines.append(lines[i])
+            # Check if there was a slither-disable-start in pre-comments
+            has_disable_start = bool(pre_comment_lines) and any(
+                "slither-disable-start" in line for line in pre_comment_lines
+            )
 
-                if i >= len(lines):
+            # If there's a slither-disable-start, search more aggressively for the matching end
+            max_lookahead = 20 if has_disable_start else 5
+
+            while (
+                has_slither_comments
+                and temp_i < num_lines
+                and (temp_i - end - 1) < max_lookahead
+            ):
+                following = lines[temp_i].strip()
+                # Check for slither-disable-end
+                if "slither-disable-end" in following and following.startswith("//"):
+                    post_comment_lines.append(lines[temp_i])
+                    next_line = temp_i + 1
                     break
-
-                # Join signature lines and normalize whitespace for matching
-                signature_text = " ".join(sig_lines)
-                # Extract signature part (everything before the opening brace)
-                brace_pos = signature_text.find("{")
-                if brace_pos != -1:
-                    signature = signature_text[:brace_pos].strip()
+                elif following == "" or has_disable_start:
+                    # Allow empty lines, or any content if we're searching for a matching end
+                    temp_i += 1
                 else:
-                    # Shouldn't happen but handle gracefully
-                    i += 1
-                    continue
-
-                # Now extract the function body
-                brace_count = lines[i].count("{") - lines[i].count("}")
-                func_lines = sig_lines[:]
-                i += 1
-
-                while i < len(lines) and brace_count > 0:
-                    func_lines.append(lines[i])
-                    brace_count += lines[i].count("{") - lines[i].count("}")
-                    i += 1
-
-                # Look ahead for Slither disable-end comments after the function
-                post_comment_lines = []
-                temp_i = i
-
-                # Check if there was a slither-disable-start in pre-comments
-                has_disable_start = any(
-                    "slither-disable-start" in line for line in pre_comment_lines
-                )
-
-                # If there's a slither-disable-start, search more aggressively for the matching end
-                max_lookahead = 20 if has_disable_start else 5
-
-                while temp_i < len(lines) and (temp_i - i) < max_lookahead:
-                    next_line = lines[temp_i].strip()
-                    # Check for slither-disable-end
-                    if "slither-disable-end" in next_line and next_line.startswith(
-                        "//"
-                    ):
-                        post_comment_lines.append(lines[temp_i])
-                        i = temp_i + 1
-                        break
-                    elif next_line == "" or has_disable_start:
-                        # Allow empty lines, or any content if we're searching for a matching end
-                        temp_i += 1
-                    else:
-                        # Stop when we hit any other content (function or non-comment)
-                        # unless we're searching for a matching slither-disable-end
-                        break
+                    # Stop when we hit any other content (function or non-comment)
+                    # unless we're searching for a matching slither-disable-end
+                    break
 
-                full_text = "\n".join(func_lines)
-                body = "\n".join(func_lines[len(sig_lines) :])
-                pre_comments = "\n".join(pre_comment_lines) if pre_comment_lines else ""
-                post_comments = (
-                    "\n".join(post_comment_lines) if post_comment_lines else ""
-                )
+            full_text = content[sig_offset:end_offset]
+            body = content[body_offset:end_offset] if end > sig_end else ""
+            pre_comments = "\n".join(pre_comment_lines)
+            post_comments = "\n".join(post_comment_lines)
+
+            functions[func_name] = YulFunction(
+                name=func_name,
+                signature=signature,
+                body=body,
+                full_text=full_text,
+                pre_comments=pre_comments,
+                post_comments=post_comments,
+                source_file=source_file,
+            )
+            ranges.append((func_name, sig_start, end))
 
-                functions[func_name] = YulFunction(
-                    name=func_name,
-                    signature=signature,
-                    body=body,
-                    full_text=full_text,
-                    pre_comments=pre_comments,
-                    post_comments=post_comments,
-                    source_file=source_file,
-                )
-            else:
-                i += 1
+            # Continue after the function; later hits on consumed lines are skipped above
+            pos = content.find("function", end_offset)
 
-        return functions
+        return functions, ranges
 
     def find_yul_function_calls(
         self, body: str, all_functions: Dict[str, YulFunction]
@@ -266,27 +475,35 @@ class YulPreprocessor:
         Find all Yul function calls in a function body.
         Returns set of function names that are called.
         """
-        called_functions = set()
+        # Names followed by "(" in order of first appearance, scanned once per body
+        call_names = self.call_names_cache.get(body)
+        if call_names is None:
+            call_names = tuple(dict.fromkeys(_CALL_RE.findall(body)))
+            self.call_names_cache[body] = call_names
 
-        # Pattern to match function calls: function_name(
-        # This looks for word boundaries followed by an opening parenthesis
-        call_pattern = re.compile(r"\b(\w+)\s*\(")
-
-        for match in call_pattern.finditer(body):
-            func_name = match.group(1)
-            # Only include if it's actually a defined function (not a built-in or keyword)
-            if func_name in all_functions:
-                called_functions.add(func_name)
-
-        return called_functions
+        # Only include if it's actually a defined function (not a built-in or keyword)
+        return {func_name for func_name in call_names if func_name in all_functions}
 
     def get_function_dependencies(
-        self, func_name: str, all_functions: Dict[str, YulFunction]
+        self,
+        func_name: str,
+        all_functions: Dict[str, YulFunction],
+        cache: Optional[Dict[str, Dict[str, YulFunction]]] = None,
     ) -> Dict[str, YulFunction]:
         """
         Get a function and all its recursive dependencies.
         Returns dict of function name to YulFunction object.
+        If cache is given, it memoizes the closures computed from this all_functions;
+        cached results are shared and must not be modified.
         """
+        if cache is not None:
+            cached = cache.get(func_name)
+            if cached is None:
+                cached = cache[func_name] = self.get_function_dependencies(
+                    func_name, all_functions
+                )
+            return cached
+
         if func_name not in all_functions:
             return {}
 
@@ -316,10 +533,14 @@ class YulPreprocessor:
         """Resolve an import path relative to the current file."""
         if import_path.startswith("/"):
             # Absolute path from root
-            resolved = self.root_dir / import_path.lstrip("/")
-        else:
-            # Relative path
+            return self.root_dir / import_path.lstrip("/")
+
+        # Relative path; resolving touches the filesystem, so remember the result
+        key = (current_file.parent, import_path)
+        resolved = self.import_path_cache.get(key)
+        if resolved is None:
             resolved = (current_file.parent / import_path).resolve()
+            self.import_path_cache[key] = resolved
 
         return resolved
 
@@ -336,17 +557,11 @@ class YulPreprocessor:
             if not file_path.exists():
                 continue
 
-            content = file_path.read_text(encoding="utf-8")
-            assembly_blocks = self.find_assembly_blocks(content)
+            _, assembly_blocks, _ = self._load(file_path)
 
             for _, _, block_content in assembly_blocks:
                 # Find all import statements
-                lines = block_content.split("\n")
-                for line in lines:
-                    import_match = self.import_pattern.search(line)
-                    if not import_match:
-                        continue
-
+                for import_match in _iter_block_imports(block_content):
                     func_names_str = import_match.group(1)
                     import_path = import_match.group(2)
 
@@ -362,27 +577,18 @@ class YulPreprocessor:
                         continue
 
                     # Parse function names
-                    func_names = [name.strip() for name in func_names_str.split(",")]
-
-                    # Process each imported function
-                    for func_name in func_names:
-                        try:
-                            # Recursively resolve this import (it's outside the cycle)
-                            imported_funcs = self.resolve_import(
-                                func_name,
-                                import_path,
-                                file_path,
-                                processing_stack,
-                                "",
-                                None,  # No cycle group since we're importing from outside
-                            )
-                            # Add to external functions
-                            for name, func in imported_funcs.items():
-                                if name not in external_functions:
-                                    external_functions[name] = func
-                        except Exception as e:
-                            # If we can't resolve, continue - it will be caught later
-                            pass
+                    func_names = _split_func_names(func_names_str)
+
+                    # Recursively resolve this import (it's outside the cycle)
+                    for imported_funcs in self._resolve_imports_lenient(
+                        func_names,
+                        import_path,
+                        file_path,
+                        processing_stack,
+                        None,  # No cycle group since we're importing from outside
+                    ):
+                        # Add to external functions
+                        self._merge_new(external_functions, imported_funcs)
 
         return external_functions
 
@@ -401,11 +607,9 @@ class YulPreprocessor:
             if not file_path.exists():
                 continue
 
-            content = file_path.read_text(encoding="utf-8")
-            assembly_blocks = self.find_assembly_blocks(content)
+            _, _, functions_per_block = self._load(file_path)
 
-            for _, _, block_content in assembly_blocks:
-                functions = self.extract_yul_functions(block_content, file_path)
+            for functions in functions_per_block:
                 for func_name, func in functions.items():
                     if func_name in all_functions:
                         # Check for signature conflicts
@@ -444,7 +648,7 @@ class YulPreprocessor:
         file_path = file_path.resolve()
 
         if processing_stack is None:
-            processing_stack = []
+            processing_stack = _ProcessingStack()
 
         # Check for circular dependencies
         if file_path in processing_stack:
@@ -460,19 +664,23 @@ class YulPreprocessor:
 
             # Check if we already have this cycle group cached
             cycle_key = frozenset(cycle_files)
-            if cycle_key not in self.cycle_groups:
+            if cycle_key not in self.cycle_ids:
                 # Collect all functions from all files in the cycle
-                self.cycle_groups[cycle_key] = self.collect_all_functions_in_cycle(
-                    cycle_files, processing_stack
+                cycle_functions = self.collect_all_functions_in_cycle(
+                    cycle_key, processing_stack
                 )
+                cycle_id = self.cycle_ids.setdefault(cycle_key, len(self.cycle_ids))
+                self.cycle_groups[cycle_id] = cycle_functions
+                for path in cycle_key:
+                    self.file_cycle_ids.setdefault(path, cycle_id)
 
             # Return cached content if available (we've already processed this as part of the cycle)
             if file_path in self.processed_cache:
                 return self.processed_cache[file_path]
 
-            # Mark that we're processing a cycle
+            # Mark that we're processing a cycle; a frozenset keeps its hash for later lookups
             if cycle_group is None:
-                cycle_group = cycle_files
+                cycle_group = cycle_key
 
             # Continue processing (will be handled specially in process_assembly_block)
 
@@ -484,36 +692,48 @@ class YulPreprocessor:
         if not file_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
 
-        content = file_path.read_text(encoding="utf-8")
+        # Read the file and find all assembly blocks
+        content, assembly_blocks, _ = self._load(file_path)
 
         # Add to processing stack
         processing_stack.append(file_path)
 
-        # Find all assembly blocks
-        assembly_blocks = self.find_assembly_blocks(content)
-
-        # Process each assembly block in reverse order (to maintain positions)
-        for start_pos, end_pos, block_content in reversed(assembly_blocks):
-            processed_block = self.process_assembly_block(
-                block_content, file_path, processing_stack, cycle_group
+        # Process each assembly block in reverse order (imports resolved while processing
+        # one block populate the caches that later blocks see, so keep the historical order)
+        processed_blocks = [
+            self.process_assembly_block(
+                assembly_blocks[block_index][2],
+                file_path,
+                processing_stack,
+                cycle_group,
+                block_index,
             )
-
-            # Replace the block in the content
-            before = content[:start_pos]
-            after = content[end_pos:]
-            content = before + "assembly {\n" + processed_block + "\n    }" + after
+            for block_index in reversed(range(len(assembly_blocks)))
+        ]
+        processed_blocks.reverse()
+
+        # Rebuild the content in one pass, replacing each block
+        if assembly_blocks:
+            pieces = []
+            cursor = 0
+            for (start_pos, end_pos, _), processed_block in zip(
+                assembly_blocks, processed_blocks
+            ):
+                pieces.append(content[cursor:start_pos])
+                pieces.append("assembly {\n")
+                pieces.append(processed_block)
+                pieces.append("\n    }")
+                cursor = end_pos
+            pieces.append(content[cursor:])
+            content = "".join(pieces)
 
         # Remove from processing stack (only if it's actually in there)
         if file_path in processing_stack:
             processing_stack.remove(file_path)
 
         # Replace .presl with .post.sol in Solidity import statements
-        # Handle both formats: import "path.presl"; and import {X} from "path.presl";
-        content = re.sub(
-            r'(import\s+(?:.*?\s+from\s+)?["\'])([^"\']*?)\.presl(["\'])',
-            r"\1\2.post.sol\3",
-            content,
-        )
+        if ".presl" in content:
+            content = _PRESL_IMPORT_RE.sub(r"\1\2.post.sol\3", content)
 
         # Cache the result
         self.processed_cache[file_path] = content
@@ -526,13 +746,16 @@ class YulPreprocessor:
         current_file: Path,
         processing_stack: List[Path],
         cycle_group: Optional[Set[Path]] = None,
+        block_index: Optional[int] = None,
     ) -> str:
         """
         Process a single assembly block, resolving all imports.
         Handles circular dependencies by using the unified function set for the cycle group.
+        block_index is the position of the block in current_file, used to reuse its cached parse.
         """
         lines = block_content.split("\n")
-        result_lines = []
+        # Lines to keep in the output block; import lines are dropped
+        keep_line = [True] * len(lines)
         imported_functions: Dict[str, YulFunction] = {}
 
         # Check if current file is part of a cycle group
@@ -542,38 +765,41 @@ class YulPreprocessor:
 
         # Extract local functions from this block to detect what needs to be deduplicated
         # These are functions defined in THIS specific assembly block
-        local_functions = self.extract_yul_functions(block_content, current_file)
+        cached = self.file_parse_cache.get(current_file)
+        if (
+            block_index is not None
+            and cached is not None
+            and block_index < len(cached[1][1])
+            and cached[1][1][block_index][2] is block_content
+        ):
+            local_functions = cached[1][2][block_index]
+            local_ranges = cached[2][block_index]
+        else:
+            local_functions, local_ranges = self.extract_yul_functions_with_ranges(
+                block_content, current_file
+            )
         local_function_names = set(local_functions.keys())
 
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-
+        for i, line in enumerate(lines):
             # Check for import statement
-            import_match = self.import_pattern.search(line)
+            import_match = _IMPORT_RE.search(line)
 
             if import_match:
                 func_names_str = import_match.group(1)
                 import_path = import_match.group(2)
 
                 # Parse multiple function names (comma-separated)
-                func_names = [name.strip() for name in func_names_str.split(",")]
+                func_names = _split_func_names(func_names_str)
 
                 # Resolve imports for all requested functions and collect their dependencies
-                imported_funcs = {}
-                for func_name in func_names:
-                    funcs_with_deps = self.resolve_import(
-                        func_name,
-                        import_path,
-                        current_file,
-                        processing_stack,
-                        block_content,
-                        cycle_group,
-                    )
-                    # Merge with deduplication
-                    for name, func in funcs_with_deps.items():
-                        if name not in imported_funcs:
-                            imported_funcs[name] = func
+                imported_funcs = self.resolve_imports(
+                    func_names,
+                    import_path,
+                    current_file,
+                    processing_stack,
+                    block_content,
+                    cycle_group,
+                )
 
                 # Add to imported functions with deduplication
                 for name, func in imported_funcs.items():
@@ -592,52 +818,24 @@ class YulPreprocessor:
 
                 # Replace import line with imported function(s)
                 # We'll add all imported functions at the end
-                i += 1
-            else:
-                result_lines.append(line)
-                i += 1
+                keep_line[i] = False
 
         # If this file is part of a cycle group, include ALL functions from the cycle
-        if current_cycle_key and current_cycle_key in self.cycle_groups:
-            cycle_functions = self.cycle_groups[current_cycle_key]
+        if current_cycle_key and current_cycle_key in self.cycle_ids:
+            cycle_functions = self.cycle_groups[self.cycle_ids[current_cycle_key]]
             # Add all cycle functions (they're already deduplicated)
-            for func_name, func in cycle_functions.items():
-                if func_name not in imported_functions:
-                    imported_functions[func_name] = func
+            self._merge_new(imported_functions, cycle_functions)
 
-        # Remove local function definitions from result_lines if they're in imported_functions
+        # Remove local function definitions if they're in imported_functions
         # This prevents duplication when functions are part of a cycle group
-        if local_functions and imported_functions:
-            # Need to rebuild result_lines without function definitions that are imported
-            filtered_lines = []
-            skip_until = -1
-
-            for idx, line in enumerate(result_lines):
-                if idx < skip_until:
-                    continue
-
-                # Check if this line starts a function definition
-                func_match = self.function_pattern.search(line)
-                if func_match and line.strip().startswith("function"):
-                    func_name = func_match.group(1)
-
-                    # If this function is in imported_functions, skip its entire definition
-                    if func_name in imported_functions and func_name in local_functions:
-                        # Find the end of this function
-                        brace_count = line.count("{") - line.count("}")
-                        skip_until = idx + 1
-
-                        while skip_until < len(result_lines) and brace_count > 0:
-                            brace_count += result_lines[skip_until].count(
-                                "{"
-                            ) - result_lines[skip_until].count("}")
-                            skip_until += 1
-
-                        continue
-
-                filtered_lines.append(line)
+        if imported_functions:
+            for func_name, first_line, last_line in local_ranges:
+                if func_name in imported_functions:
+                    keep_line[first_line : last_line + 1] = [False] * (
+                        last_line + 1 - first_line
+                    )
 
-            result_lines = filtered_lines
+        result_lines = list(compress(lines, keep_line))
 
         # Prepend all imported functions at the beginning of the block
         if imported_functions:
@@ -668,50 +866,101 @@ class YulPreprocessor:
                         f"            function exclude_coverage_stop_{func.name}() {{}} // solhint-disable-line no-empty-blocks"
                     )
 
-            # Add imported functions before other content
-            return "\n".join(func_lines) + "\n" + "\n".join(result_lines)
+            # Add imported functions before other content, keeping the newline
+            # after them even when nothing else remains in the block
+            return "\n".join(chain(func_lines, result_lines or ("",)))
         else:
             return "\n".join(result_lines)
 
-    def resolve_import(
+    @staticmethod
+    def _merge_new(
+        result: Dict[str, YulFunction], functions: Mapping[str, YulFunction]
+    ):
+        """
+        Add functions to result, keeping the first definition seen for each name.
+        New names are appended in order, since the order decides the output order.
+        """
+        if not result:
+            result.update(functions)
+            return
+        if functions.keys() <= result.keys():
+            return
+        for name, func in functions.items():
+            if name not in result:
+                result[name] = func
+
+    def _resolve_imports_lenient(
         self,
-        func_name: str,
+        func_names: List[str],
+        import_path: str,
+        current_file: Path,
+        processing_stack: List[Path],
+        cycle_group: Optional[Set[Path]],
+    ):
+        """
+        Yield the resolved functions of an import statement, skipping names that fail to resolve.
+        Used while collecting dependencies, where unresolved imports are reported later.
+        """
+        try:
+            yield self.resolve_imports(
+                func_names, import_path, current_file, processing_stack, "", cycle_group
+            )
+            return
+        except Exception:
+            if len(func_names) == 1:
+                return
+
+        # Retry name by name so the names that do resolve are still collected
+        for func_name in func_names:
+            try:
+                yield self.resolve_imports(
+                    [func_name],
+                    import_path,
+                    current_file,
+                    processing_stack,
+                    "",
+                    cycle_group,
+                )
+            except Exception:
+                pass
+
+    def resolve_imports(
+        self,
+        func_names: List[str],
         import_path: str,
         current_file: Path,
         processing_stack: List[Path],
         current_block_content: str = "",
         cycle_group: Optional[Set[Path]] = None,
-    ) -> Dict[str, YulFunction]:
+    ) -> Mapping[str, YulFunction]:
         """
-        Resolve a single import statement.
-        Returns dict of function name to YulFunction (only includes requested function and its dependencies).
+        Resolve a single import statement, which may name several functions.
+        The target file is processed and parsed once for all requested functions.
+        Returns a read-only mapping of function name to YulFunction (only includes requested functions and their dependencies).
         Supports 'self' keyword to import from the current file's own assembly block.
         Handles circular dependencies by using cached cycle group functions.
         """
+        result: Dict[str, YulFunction] = {}
+
         # Handle 'self' imports - search all assembly blocks in the current file
         if import_path.strip().lower() == "self":
             # Read the entire current file to search all assembly blocks
             if not current_file.exists():
                 raise FileNotFoundError(f"Current file not found: {current_file}")
 
-            file_content = current_file.read_text(encoding="utf-8")
-            assembly_blocks = self.find_assembly_blocks(file_content)
+            _, assembly_blocks, functions_per_block = self._load(current_file)
 
             # Extract all functions from all assembly blocks in the current file
             all_functions = {}
             external_deps = {}  # Track functions imported from external files
 
-            for _, _, block_content in assembly_blocks:
-                functions = self.extract_yul_functions(block_content, current_file)
+            for (_, _, block_content), functions in zip(
+                assembly_blocks, functions_per_block
+            ):
                 all_functions.update(functions)
 
                 # Also resolve any imports within this block to get external dependencies
-                lines = block_content.split("\n")
-                for line in lines:
-                    import_match = self.import_pattern.search(line)
-                    if not import_match:
-                        continue
-
+                for import_match in _iter_block_imports(block_content):
                     func_names_str = import_match.group(1)
                     ext_import_path = import_match.group(2)
 
@@ -720,39 +969,39 @@ class YulPreprocessor:
                         continue
 
                     # Parse function names
-                    ext_func_names = [
-                        name.strip() for name in func_names_str.split(",")
-                    ]
-
-                    # Resolve each external import
-                    for ext_func_name in ext_func_names:
-                        try:
-                            ext_funcs = self.resolve_import(
-                                ext_func_name,
-                                ext_import_path,
-                                current_file,
-                                processing_stack,
-                                "",
-                                cycle_group,
-                            )
-                            external_deps.update(ext_funcs)
-                        except Exception:
-                            # If we can't resolve, it might be resolved later
-                            pass
+                    ext_func_names = _split_func_names(func_names_str)
 
-            # Combine local functions with external dependencies for dependency resolution
-            all_functions_with_deps = {**all_functions, **external_deps}
+                    # Resolve the external import; if it fails it might be resolved later
+                    for ext_funcs in self._resolve_imports_lenient(
+                        ext_func_names,
+                        ext_import_path,
+                        current_file,
+                        processing_stack,
+                        cycle_group,
+                    ):
+                        external_deps.update(ext_funcs)
 
-            # Check if the requested function exists
-            if func_name not in all_functions:
-                available = ", ".join(sorted(all_functions.keys()))
-                raise ValueError(
-                    f"Function '{func_name}' not found in any assembly block in {current_file.name}\n"
-                    f"Available functions: {available}"
-                )
+            # Combine local functions with external dependencies for dependency resolution;
+            # without external imports the local functions are used as they are
+            all_functions_with_deps = (
+                {**all_functions, **external_deps} if external_deps else all_functions
+            )
 
-            # Return only the requested function and its dependencies
-            return self.get_function_dependencies(func_name, all_functions_with_deps)
+            for func_name in func_names:
+                # Check if the requested function exists
+                if func_name not in all_functions:
+                    available = ", ".join(sorted(all_functions.keys()))
+                    raise ValueError(
+                        f"Function '{func_name}' not found in any assembly block in {current_file.name}\n"
+                        f"Available functions: {available}"
+                    )
+
+                # Keep only the requested functions and their dependencies
+                self._merge_new(
+                    result,
+                    self.get_function_dependencies(func_name, all_functions_with_deps),
+                )
+            return result
 
         # Resolve the file path
         target_file = self.resolve_import_path(import_path, current_file)
@@ -761,16 +1010,25 @@ class YulPreprocessor:
         if cycle_group and target_file in cycle_group:
             # This is a circular dependency - use the cached cycle functions
             cycle_key = frozenset(cycle_group)
-            if cycle_key in self.cycle_groups:
-                all_functions = self.cycle_groups[cycle_key]
-                if func_name not in all_functions:
-                    available = ", ".join(sorted(all_functions.keys()))
-                    raise ValueError(
-                        f"Function '{func_name}' not found in circular dependency group\n"
-                        f"Available functions: {available}"
+            if cycle_key in self.cycle_ids:
+                cycle_id = self.cycle_ids[cycle_key]
+                all_functions = self.cycle_groups[cycle_id]
+                dependency_cache = self.cycle_dependency_cache.setdefault(cycle_id, {})
+                for func_name in func_names:
+                    if func_name not in all_functions:
+                        available = ", ".join(sorted(all_functions.keys()))
+                        raise ValueError(
+                            f"Function '{func_name}' not found in circular dependency group\n"
+                            f"Available functions: {available}"
+                        )
+                    # Keep only the requested functions and their dependencies
+                    self._merge_new(
+                        result,
+                        self.get_function_dependencies(
+                            func_name, all_functions, dependency_cache
+                        ),
                     )
-                # Return only the requested function and its dependencies
-                return self.get_function_dependencies(func_name, all_functions)
+                return result
 
         # If it's a .presl file, process it first
         if target_file.suffix == ".presl":
@@ -778,28 +1036,64 @@ class YulPreprocessor:
                 target_file, processing_stack, cycle_group
             )
         else:
-            # Regular .sol file, just read it
+            # Regular .sol file, just read it (once, while its mtime is unchanged)
             if not target_file.exists():
                 raise FileNotFoundError(f"Import target not found: {target_file}")
-            processed_content = target_file.read_text(encoding="utf-8")
+            processed_content, _, _ = self._load(target_file)
 
         # Check if target file is part of any cached cycle group
         target_cycle_functions = None
-        for cycle_key, cycle_functions in self.cycle_groups.items():
-            if target_file in cycle_key:
-                target_cycle_functions = cycle_functions
-                break
+        target_cycle_id = self.file_cycle_ids.get(target_file)
+        if target_cycle_id is not None:
+            target_cycle_functions = self.cycle_groups[target_cycle_id]
 
         # If target is part of a cycle, return all functions from that cycle
         if target_cycle_functions is not None:
-            if func_name not in target_cycle_functions:
-                available = ", ".join(sorted(target_cycle_functions.keys()))
+            for func_name in func_names:
+                if func_name not in target_cycle_functions:
+                    available = ", ".join(sorted(target_cycle_functions.keys()))
+                    raise ValueError(
+                        f"Function '{func_name}' not found in cycle group\n"
+                        f"Available functions: {available}"
+                    )
+            # Return ALL functions from the cycle (they're all potentially interdependent),
+            # as a read-only view instead of a copy of the whole group
+            return MappingProxyType(target_cycle_functions)
+
+        all_functions, dependency_cache = self._processed_functions(
+            target_file, processed_content
+        )
+
+        for func_name in func_names:
+            # Check if the requested function exists
+            if func_name not in all_functions:
+                available = ", ".join(sorted(all_functions.keys()))
                 raise ValueError(
-                    f"Function '{func_name}' not found in cycle group\n"
+                    f"Function '{func_name}' not found in {target_file}\n"
                     f"Available functions: {available}"
                 )
-            # Return ALL functions from the cycle (they're all potentially interdependent)
-            return target_cycle_functions.copy()
+
+            # Keep only the requested functions and their recursive dependencies
+            self._merge_new(
+                result,
+                self.get_function_dependencies(
+                    func_name, all_functions, dependency_cache
+                ),
+            )
+        return result
+
+    def _processed_functions(
+        self, target_file: Path, processed_content: str
+    ) -> Tuple[Dict[str, YulFunction], Dict[str, Dict[str, YulFunction]]]:
+        """
+        Extract all functions from all assembly blocks of a processed import target.
+        The result is reused while the target's processed content is unchanged,
+        so a file imported from many places is only parsed once.
+        Returns (functions, dependency closure cache for get_function_dependencies).
+        """
+        cached = self.processed_functions_cache.get(target_file)
+        if cached is not None and cached[0] == processed_content:
+            return cached[1], cached[2]
 
         # Find all assembly blocks in the target file
         assembly_blocks = self.find_assembly_blocks(processed_content)
@@ -810,16 +1104,13 @@ class YulPreprocessor:
             functions = self.extract_yul_functions(block_content, target_file)
             all_functions.update(functions)
 
-        # Check if the requested function exists
-        if func_name not in all_functions:
-            available = ", ".join(sorted(all_functions.keys()))
-            raise ValueError(
-                f"Function '{func_name}' not found in {target_file}\n"
-                f"Available functions: {available}"
-            )
-
-        # Return only the requested function and its recursive dependencies
-        return self.get_function_dependencies(func_name, all_functions)
+        dependency_cache = {}
+        self.processed_functions_cache[target_file] = (
+            processed_content,
+            all_functions,
+            dependency_cache,
+        )
+        return all_functions, dependency_cache
 
     def format_with_forge(self, path: Path) -> bool:
         """
@@ -828,9 +1119,19 @@ class YulPreprocessor:
         If path is a file, formats just that file.
         Returns True if successful, False otherwise.
         """
+        # Look forge up once instead of failing to spawn it for every file
+        if self.forge_path is None:
+            self.forge_path = shutil.which("forge") or ""
+            if not self.forge_path:
+                print(
+                    "⚠ Warning: forge not found in PATH, skipping formatting",
+                    file=sys.stderr,
+                )
+        if not self.forge_path:
+            return False
         try:
             result = subprocess.run(
-                ["forge", "fmt", str(path)],
+                [self.forge_path, "fmt", str(path)],
                 capture_output=True,
                 text=True,
                 timeout=30,
@@ -904,35 +1205,120 @@ class YulPreprocessor:
         """
         try:
             with open(file_path, "r", encoding="utf-8") as f:
-                # Check first 10 lines for the marker
-                for _ in range(10):
-                    line = f.readline()
-                    if not line:
+                # Read the header in one go, reading on only if the first 10 lines are longer
+                head = f.read(4096)
+                while head.count("\n") < 10:
+                    chunk = f.read(4096)
+                    if not chunk:
                         break
-                    # Normalize whitespace and check for the marker
-                    normalized = re.sub(r"\s+", "", line.strip().lower())
-                    if (
-                        "does-not-compile" in normalized
-                        or "doesnotcompile" in normalized
-                    ):
-                        return True
+                    head += chunk
+            # Check first 10 lines for the marker
+            for line in head.split("\n", 10)[:10]:
+                # Normalize whitespace and check for the marker
+                normalized = "".join(line.lower().split())
+                if "does-not-compile" in normalized or "doesnotcompile" in normalized:
+                    return True
             return False
         except Exception:
             return False
 
-    def preprocess_directory(self, directory: str, format_output: bool = True) -> int:
+    def load_directory_cache(
+        self, cache_dir: Path, presl_files: List[Path]
+    ) -> Optional[Dict[str, str]]:
+        """
+        Load the outputs of a previous preprocess_directory run from cache_dir.
+        Outputs depend on the order files are processed in, so the cache is only used
+        when the same .presl files are found and every file read by that run, as well as
+        this script itself, is unchanged.
+        Returns a dict of resolved input path -> processed content, or None on a miss.
+        """
+        try:
+            index = json.loads((cache_dir / _CACHE_INDEX).read_text(encoding="utf-8"))
+            if (
+                index.get("version") != _CACHE_VERSION
+                or index.get("tool") != _TOOL_DIGEST
+                or index["files"] != [str(path.resolve()) for path in presl_files]
+            ):
+                return None
+            for path, digest in index["inputs"].items():
+                if _file_digest(Path(path)) != digest:
+                    return None
+            return {
+                path: (cache_dir / f"{digest}.post.sol").read_text(encoding="utf-8")
+                for path, digest in index["outputs"].items()
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save_directory_cache(
+        self, cache_dir: Path, presl_files: List[Path], outputs: Dict[str, str]
+    ):
+        """
+        Store the outputs of a preprocess_directory run in cache_dir, together with
+        the hashes of every file the run read.
+        """
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        inputs = {
+            str(path): _file_digest(path)
+            for path in sorted(
+                self.source_files.union(p.resolve() for p in presl_files)
+            )
+        }
+
+        output_digests = {}
+        for path, processed_content in outputs.items():
+            data = processed_content.encode("utf-8")
+            digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+            output_digests[path] = digest
+            cached_file = cache_dir / f"{digest}.post.sol"
+            if not cached_file.exists():
+                cached_file.write_bytes(data)
+
+        # Drop outputs no longer referenced by the index
+        referenced = {f"{digest}.post.sol" for digest in output_digests.values()}
+        for cached_file in cache_dir.glob("*.post.sol"):
+            if cached_file.name not in referenced:
+                cached_file.unlink()
+
+        index = {
+            "version": _CACHE_VERSION,
+            "tool": _TOOL_DIGEST,
+            "files": [str(path.resolve()) for path in presl_files],
+            "inputs": inputs,
+            "outputs": output_digests,
+        }
+        index_file = cache_dir / _CACHE_INDEX
+        tmp_file = index_file.with_suffix(".tmp")
+        tmp_file.write_text(json.dumps(index, indent=1), encoding="utf-8")
+        tmp_file.replace(index_file)
+
+    def preprocess_directory(
+        self,
+        directory: str,
+        format_output: bool = True,
+        cache_dir: Optional[str] = None,
+    ) -> int:
         """
         Preprocess all .presl files (including .t.presl) in a directory.
         Optionally formats the outputs with forge fmt.
+        If cache_dir is given, outputs are reused from a previous run when none of its inputs changed.
         Returns 0 if all files are preprocessed successfully (except those with "// does-not-compile" marker),
         returns 1 if any file fails to preprocess (excluding marked files).
         """
         dir_path = Path(directory)
         # Find all .presl files (which includes .t.presl since they end in .presl)
-        presl_files = sorted(dir_path.rglob("*.presl"))
+        presl_files = sorted(_find_presl_files(dir_path))
 
         print(f"Found {len(presl_files)} .presl files in {directory}")
 
+        cache_path = Path(cache_dir) if cache_dir else None
+        cached_outputs = None
+        if cache_path is not None:
+            cached_outputs = self.load_directory_cache(cache_path, presl_files)
+            if cached_outputs is not None:
+                print(f"Using cached outputs from {cache_path}")
+        outputs: Dict[str, str] = {}
+
         output_files = []
         failed = False
 
@@ -950,7 +1336,11 @@ class YulPreprocessor:
 
             try:
                 print(f"\nProcessing: {pre_file.relative_to(dir_path)}")
-                processed_content = self.process_file(pre_file)
+                if cached_outputs is not None:
+                    processed_content = cached_outputs[str(pre_file.resolve())]
+                else:
+                    processed_content = self.process_file(pre_file)
+                outputs[str(pre_file.resolve())] = processed_content
                 output_file.write_text(processed_content, encoding="utf-8")
                 print(f"✓ Output: {output_file.relative_to(dir_path)}")
                 output_files.append(output_file)
@@ -958,6 +1348,9 @@ class YulPreprocessor:
                 print(f"✗ Error: {e}", file=sys.stderr)
                 failed = True
 
+        if cache_path is not None and cached_outputs is None and not failed:
+            self.save_directory_cache(cache_path, presl_files, outputs)
+
         # Format all output files with forge fmt by formatting the entire directory
         if format_output and output_files:
             print(f"\nFormatting {len(output_files)} output files with forge fmt...")
@@ -969,13 +1362,21 @@ class YulPreprocessor:
         return 1 if failed else 0
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage:")
-        print("  python3 yul_preprocessor.py <directory>")
-        sys.exit(1)
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Resolve Yul imports in all .presl files of a directory.",
+        allow_abbrev=False,
+    )
+    parser.add_argument("directory", help="Directory containing .presl files")
+    parser.add_argument(
+        "--cache-dir",
+        help="Reuse the outputs of a previous run stored here when no input changed",
+    )
+    # Unknown or extra arguments are a usage error rather than silently ignored
+    args = parser.parse_args(argv)
 
-    directory = sys.argv[1]
+    directory = args.directory
+    cache_dir = args.cache_dir
 
     # Verify the argument is a directory
     dir_path = Path(directory)
@@ -984,7 +1385,7 @@ def main():
         sys.exit(1)
 
     preprocessor = YulPreprocessor(root_dir=directory)
-    exit_code = preprocessor.preprocess_directory(directory)
+    exit_code = preprocessor.preprocess_directory(directory, cache_dir=cache_dir)
     sys.exit(exit_code)
 
 